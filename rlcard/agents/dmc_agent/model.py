@@ -56,6 +56,8 @@ class DMCAgent:
         self.net = DMCNet(state_shape, action_shape, mlp_layers).to(self.device)
         self.exp_epsilon = exp_epsilon
         self.action_shape = action_shape
+        # one-hot action features, action id k sets entry k - 1 as Env.get_action_feature
+        self.action_features = np.roll(np.eye(action_shape[0], dtype=np.float32), -1, axis=1)
 
     def step(self, state):
         action_keys, values = self.predict(state)
@@ -79,6 +81,44 @@ class DMCAgent:
 
         return action, info
 
+    def batch_step(self, x, z, legal_mask):
+        ''' Epsilon-greedy actions for a batch of states with one forward pass
+
+        Args:
+            x (numpy.array): (N, state_shape) the x_batch of the states
+            z (numpy.array): (N, ...) the z_batch of the states
+            legal_mask (numpy.array): (N, num_actions) the legal actions
+
+        Returns:
+            (numpy.array): The action id of each state
+        '''
+        actions = self.batch_eval_step(x, z, legal_mask)
+        if self.exp_epsilon > 0:
+            explore = np.random.rand(len(actions)) < self.exp_epsilon # 以 𝛆 的概率探索
+            if explore.any():
+                mask = legal_mask[explore]
+                actions[explore] = np.argmax(np.random.rand(*mask.shape) * mask, axis=1)
+        return actions
+
+    def batch_eval_step(self, x, z, legal_mask):
+        ''' Greedy actions for a batch of states, every legal (state, action) pair is one row of a single forward pass
+
+        Args:
+            x (numpy.array): (N, state_shape) the x_batch of the states
+            z (numpy.array): (N, ...) the z_batch of the states
+            legal_mask (numpy.array): (N, num_actions) the legal actions
+
+        Returns:
+            (numpy.array): The action id of each state
+        '''
+        rows, action_keys = np.nonzero(legal_mask)
+        values = self.net.forward(torch.from_numpy(np.asarray(x, dtype=np.float32)[rows]).to(self.device),
+                                  torch.from_numpy(np.asarray(z, dtype=np.float32)[rows]).to(self.device),
+                                  torch.from_numpy(self.action_features[action_keys]).to(self.device))
+        action_values = np.full(legal_mask.shape, -np.inf, dtype=np.float32)
+        action_values[rows, action_keys] = values.cpu().detach().numpy()
+        return np.argmax(action_values, axis=1)
+
     def share_memory(self):
         self.net.share_memory()
 
@@ -92,15 +132,9 @@ class DMCAgent:
         # Prepare obs and actions
         x_batch = state['x_batch'].astype(np.float32)
         z_batch = state['z_batch'].astype(np.float32)
-        legal_actions = state['legal_actions']
-        action_keys = np.array(list(legal_actions.keys()))
-        action_values = list(legal_actions.values())
+        action_keys = state['legal_ids']
         # One-hot encoding if there is no action features —— 给 action_values 按照 action 下标进行 one-hot 编码
-        for i in range(len(action_values)):
-            if action_values[i] is None:
-                action_values[i] = np.zeros(self.action_shape[0])
-                action_values[i][action_keys[i]-1] = 1
-        action_values = np.array(action_values, dtype=np.float32) # 统一 action_values 的数据格式
+        action_values = self.action_features[action_keys]
 
         x_batch = np.repeat(x_batch[np.newaxis, :], len(action_keys), axis=0) # 统一 x_batch 的数据格式
         z_batch = np.repeat(z_batch[np.newaxis, :, :], len(action_keys), axis=0)# 统一 z_batch 的数据格式
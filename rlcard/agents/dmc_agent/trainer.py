@@ -20,6 +20,7 @@ import timeit
 import pprint
 from collections import deque
 
+import numpy as np
 import torch
 from torch import multiprocessing as mp
 from torch import nn
@@ -91,7 +92,8 @@ class DMCTrainer:
                  learning_rate=0.0001,
                  alpha=0.99,
                  momentum=0,
-                 epsilon=0.00001):
+                 epsilon=0.00001,
+                 pack_obs=False):
         '''
         Deep Monte-Carlo
 
@@ -114,6 +116,7 @@ class DMCTrainer:
             alpha (float): RMSProp smoothing constant
             momentum (float): RMSProp momentum
             epsilon (float): RMSProp epsilon
+            pack_obs (boolean): Whether the shared buffers keep obs_x and obs_z as bits, 8 times smaller
         '''
         self.env = env # 已创建好的 Env
 
@@ -143,6 +146,7 @@ class DMCTrainer:
         self.alpha = alpha # RMSProp 平滑连续率
         self.momentum = momentum # RMSProp 动力值
         self.epsilon = epsilon # RMSProp 𝛆
+        self.pack_obs = pack_obs # 共享 buffers 中的观测是否按位压缩
 
         self.action_shape = self.env.action_shape
         if self.action_shape[0] == None:  # One-hot encoding
@@ -166,7 +170,8 @@ class DMCTrainer:
         buffers = create_buffers(self.T,
                                  self.num_buffers,
                                  self.env.state_shape,
-                                 self.action_shape)
+                                 self.action_shape,
+                                 self.pack_obs)
 
         # Initialize queues
         actor_processes = []
@@ -228,7 +233,7 @@ class DMCTrainer:
             """Thread target for the learning process."""
             nonlocal frames, stats
             while frames < self.total_frames:
-                batch = get_batch(free_queue[device][position], full_queue[device][position], buffers[device][position], self.B, local_lock)
+                batch = get_batch(free_queue[device][position], full_queue[device][position], buffers[device][position], self.B, local_lock, int(np.prod(self.env.state_shape[position])))
                 _stats = learn(position, models, learner_model.get_agent(position), batch,
                     optimizers[position], self.training_device, self.max_grad_norm, self.mean_episode_return_buf, position_lock)
 
@@ -19,6 +19,9 @@ import traceback
 import numpy as np
 import torch
 
+from rlcard.utils.utils import get_packed_size
+from rlcard.utils.trajectory import TrajectoryColumns
+
 shandle = logging.StreamHandler()
 shandle.setFormatter(
     logging.Formatter(
@@ -29,11 +32,33 @@ log.propagate = False
 log.addHandler(shandle)
 log.setLevel(logging.INFO)
 
+# BIT_SHIFTS[i] moves bit i of a byte to the lowest bit, the most significant bit first as np.packbits
+BIT_SHIFTS = torch.arange(7, -1, -1, dtype=torch.uint8)
+
+def unpack_obs(packed, x_size, z_shape=(4, 126)):
+    ''' Unpack observations packed by rlcard.utils.pack_obs on the device of the tensor
+
+    Args:
+        packed (Tensor): (..., packed_size) uint8 packed observations
+        x_size (int): The size of x
+        z_shape (tuple): The shape of z
+
+    Returns:
+        (tuple): int8 tensors x of shape (..., x_size) and z of shape (..., *z_shape)
+    '''
+    z_size = int(np.prod(z_shape))
+    bits = (packed.unsqueeze(-1) >> BIT_SHIFTS.to(packed.device)) & 1
+    bits = bits.flatten(-2)[..., :x_size + z_size].to(torch.int8)
+    x = bits[..., :x_size]
+    z = bits[..., x_size:].reshape(packed.shape[:-1] + tuple(z_shape))
+    return x, z
+
 def get_batch(free_queue,
               full_queue,
               buffers,
               batch_size,
-              lock):
+              lock,
+              x_size=None):
     with lock:
         indices = [full_queue.get() for _ in range(batch_size)] # 在 batch_size 大小的 buffers 中取 batch_size 大小的 batch 数据进行学习，达到抽样的效果
     batch = {
@@ -42,9 +67,11 @@ def get_batch(free_queue,
     }
     for m in indices:
         free_queue.put(m)
+    if 'obs' in batch: # 压缩存储的观测，还原为 obs_x 和 obs_z
+        batch['obs_x'], batch['obs_z'] = unpack_obs(batch.pop('obs'), x_size)
     return batch
 
-def create_buffers(T, num_buffers, state_shape, action_shape):
+def create_buffers(T, num_buffers, state_shape, action_shape, pack_obs=False):
     buffers = []
     for device in range(torch.cuda.device_count()):
         buffers.append([])
@@ -57,6 +84,9 @@ def create_buffers(T, num_buffers, state_shape, action_shape):
                 obs_x=dict(size=(T,)+tuple(state_shape[player_id]), dtype=torch.int8),
                 obs_z=dict(size=(T, 4, 126), dtype=torch.int8),
             )
+            if pack_obs: # obs_x 和 obs_z 按位压缩存储，每个决策约 101 字节
+                del specs['obs_x'], specs['obs_z']
+                specs['obs'] = dict(size=(T, get_packed_size(int(np.prod(state_shape[player_id])))), dtype=torch.uint8)
             _buffers: Buffers = {key: [] for key in specs}  # type: ignore
             for _ in range(num_buffers):
                 for key in _buffers:
@@ -86,52 +116,37 @@ def act(i, device, T, free_queue, full_queue, model, buffers, env):
         env.seed(i)
         env.set_agents(model.get_agents())
 
-        done_buf = [[] for _ in range(env.num_players)]
-        episode_return_buf = [[] for _ in range(env.num_players)]
-        target_buf = [[] for _ in range(env.num_players)]
-        obs_x_buf = [[] for _ in range(env.num_players)]
-        obs_z_buf = [[] for _ in range(env.num_players)]
-        obs_action_buf = [[] for _ in range(env.num_players)]
+        # the decisions of each game are written into columns, the returns and action features are taken from them in one pass
+        pack = 'obs' in buffers[0] # 共享 buffers 是否按位压缩
+        columns = TrajectoryColumns(env.num_players, env.state_shape[0], num_actions=env.num_actions, pack=pack)
+        action_features = np.stack([env.get_action_feature(action) for action in range(env.num_actions)])
+        obs_keys = {'obs': 'obs'} if pack else {'obs_x': 'x', 'obs_z': 'z'}
+        keys = ['done', 'episode_return', 'target', 'obs_action'] + list(obs_keys)
+        bufs = [{key: [] for key in keys} for _ in range(env.num_players)]
         size = [0 for _ in range(env.num_players)]
 
         while True:
-            trajectories, payoffs = env.run(is_training=True)
+            _, payoffs = env.run(is_training=True, columns=columns)
             for p in range(env.num_players):
-                size[p] += len(trajectories[p][:-1]) // 2
-                diff = size[p] - len(target_buf[p])
-                if diff > 0:
-                    done_buf[p].extend([False for _ in range(diff-1)])
-                    done_buf[p].append(True)
-                    episode_return_buf[p].extend([0.0 for _ in range(diff-1)])
-                    episode_return_buf[p].append(float(payoffs[p]))
-                    target_buf[p].extend([float(payoffs[p]) for _ in range(diff)])
-                    # State and action
-                    for i in range(0, len(trajectories[p])-2, 2):
-                        obs_x = trajectories[p][i]['x_batch'] # 获取本局游戏 玩家 p 的 state_x 部分
-                        obs_z = trajectories[p][i]['z_batch'] # 获取本局游戏 玩家 p 的 state_z 部分
-                        obs_action = env.get_action_feature(trajectories[p][i+1]) # 获取本局游戏 玩家 p 的所有 action（61 —— one-hot编码）
-                        obs_x_buf[p].append(torch.from_numpy(obs_x))
-                        obs_z_buf[p].append(torch.from_numpy(obs_z))
-                        obs_action_buf[p].append(torch.from_numpy(obs_action))
-                
+                length = columns.length[p]
+                if length > 0:
+                    bufs[p]['done'].append(columns.done[p, :length].copy())
+                    bufs[p]['episode_return'].append(columns.reward[p, :length].copy()) # 只有最后一步为本局 payoff
+                    bufs[p]['target'].append(columns.get_targets(p)) # 每一步的目标都是本局 payoff
+                    bufs[p]['obs_action'].append(action_features[columns.action[p, :length]]) # 动作的 one-hot 编码
+                    for key, column in obs_keys.items():
+                        bufs[p][key].append(getattr(columns, column)[p, :length].copy())
+                    size[p] += length
+
                 if size[p] > T: # 每个玩家 p 达到 T 次数据量时，将数据存入 queue 便于后续更新
                     index = free_queue[p].get()
                     if index is None:
                         break
-                    for t in range(T):
-                        buffers[p]['done'][index][t, ...] = done_buf[p][t]
-                        buffers[p]['episode_return'][index][t, ...] = episode_return_buf[p][t]
-                        buffers[p]['target'][index][t, ...] = target_buf[p][t]
-                        buffers[p]['obs_x'][index][t, ...] = obs_x_buf[p][t]
-                        buffers[p]['obs_z'][index][t, ...] = obs_z_buf[p][t]
-                        buffers[p]['obs_action'][index][t, ...] = obs_action_buf[p][t]
+                    for key in keys:
+                        data = np.concatenate(bufs[p][key])
+                        buffers[p][key][index][...] = torch.from_numpy(data[:T])
+                        bufs[p][key] = [data[T:]]
                     full_queue[p].put(index)
-                    done_buf[p] = done_buf[p][T:]
-                    episode_return_buf[p] = episode_return_buf[p][T:]
-                    target_buf[p] = target_buf[p][T:]
-                    obs_x_buf[p] = obs_x_buf[p][T:]
-                    obs_z_buf[p] = obs_z_buf[p][T:]
-                    obs_action_buf[p] = obs_action_buf[p][T:]
                     size[p] -= T
 
     except KeyboardInterrupt:
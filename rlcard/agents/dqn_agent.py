@@ -56,7 +56,8 @@ class DQNAgent(object):
                  train_every=1,
                  mlp_layers=None,
                  learning_rate=0.00005,
-                 device=None):
+                 device=None,
+                 pack_memory=False):
 
         '''
         Q-Learning algorithm for off-policy TD control using Function Approximation.
@@ -81,6 +82,7 @@ class DQNAgent(object):
             mlp_layers (list): The layer number and the dimension of each layer in MLP
             learning_rate (float): The learning rate of the DQN agent.
             device (torch.device): whether to use the cpu or gpu
+            pack_memory (boolean): Whether the replay memory keeps the 0/1 states as bits
         '''
         self.use_raw = False
         self.replay_memory_init_size = replay_memory_init_size
@@ -113,7 +115,7 @@ class DQNAgent(object):
             mlp_layers=mlp_layers, device=self.device)
 
         # Create replay memory
-        self.memory = Memory(replay_memory_size, batch_size)
+        self.memory = Memory(replay_memory_size, batch_size, pack_memory)
 
     def feed(self, ts):
         ''' Store data in to replay buffer and train the agent. There are two stages.
@@ -124,7 +126,7 @@ class DQNAgent(object):
             ts (list): a list of 5 elements that represent the transition
         '''
         (state, action, reward, next_state, done) = tuple(ts)
-        self.feed_memory(state['x_batch'], action, reward, next_state['x_batch'], list(state['legal_actions'].keys()), done)
+        self.feed_memory(state['x_batch'], action, reward, next_state['x_batch'], state['legal_mask'], done)
         self.total_t += 1
         tmp = self.total_t - self.replay_memory_init_size
         if tmp>=0 and tmp%self.train_every == 0:
@@ -142,13 +144,13 @@ class DQNAgent(object):
         '''
         q_values = self.predict(state)
         epsilon = self.epsilons[min(self.total_t, self.epsilon_decay_steps-1)]
-        legal_actions = list(state['legal_actions'].keys())
+        legal_actions = state['legal_ids']
         probs = np.ones(len(legal_actions), dtype=float) * epsilon / len(legal_actions)
-        best_action_idx = legal_actions.index(np.argmax(q_values))
+        best_action_idx = np.searchsorted(legal_actions, np.argmax(q_values)) # legal_ids 按 id 升序
         probs[best_action_idx] += (1.0 - epsilon)
         action_idx = np.random.choice(np.arange(len(probs)), p=probs)
 
-        return legal_actions[action_idx]
+        return int(legal_actions[action_idx])
 
     def eval_step(self, state):
         ''' Predict the action for evaluation purpose.
@@ -164,10 +166,44 @@ class DQNAgent(object):
         best_action = np.argmax(q_values)
 
         info = {}
-        info['values'] = {state['raw_legal_actions'][i]: float(q_values[list(state['legal_actions'].keys())[i]]) for i in range(len(state['legal_actions']))}
+        legal_ids = state['legal_ids']
+        info['values'] = {state['raw_legal_actions'][i]: float(q_values[legal_ids[i]]) for i in range(len(legal_ids))}
 
         return best_action, info
 
+    def batch_step(self, x, z, legal_mask):
+        ''' Epsilon-greedy actions for a batch of states with one forward pass
+
+        Args:
+            x (numpy.array): (N, state_shape) the x_batch of the states
+            z (numpy.array): (N, ...) the z_batch of the states, unused
+            legal_mask (numpy.array): (N, num_actions) the legal actions
+
+        Returns:
+            (numpy.array): The action id of each state
+        '''
+        actions = self.batch_eval_step(x, z, legal_mask)
+        epsilon = self.epsilons[min(self.total_t, self.epsilon_decay_steps-1)]
+        explore = np.random.rand(len(actions)) < epsilon # 以 𝛆 的概率在合法动作中均匀探索
+        if explore.any():
+            mask = legal_mask[explore]
+            actions[explore] = np.argmax(np.random.rand(*mask.shape) * mask, axis=1)
+        return actions
+
+    def batch_eval_step(self, x, z, legal_mask):
+        ''' Greedy actions for a batch of states with one forward pass
+
+        Args:
+            x (numpy.array): (N, state_shape) the x_batch of the states
+            z (numpy.array): (N, ...) the z_batch of the states, unused
+            legal_mask (numpy.array): (N, num_actions) the legal actions
+
+        Returns:
+            (numpy.array): The action id of each state
+        '''
+        q_values = self.q_estimator.predict_nograd(np.asarray(x))
+        return np.argmax(np.where(legal_mask, q_values, -np.inf), axis=1)
+
     def predict(self, state):
         ''' Predict the masked Q-values
 
@@ -179,9 +215,7 @@ class DQNAgent(object):
         '''
         
         q_values = self.q_estimator.predict_nograd(np.expand_dims(state['x_batch'], 0))[0]
-        masked_q_values = -np.inf * np.ones(self.num_actions, dtype=float)
-        legal_actions = list(state['legal_actions'].keys())
-        masked_q_values[legal_actions] = q_values[legal_actions]
+        masked_q_values = np.where(state['legal_mask'], q_values, -np.inf)
 
         return masked_q_values
 
@@ -191,16 +225,11 @@ class DQNAgent(object):
         Returns:
             loss (float): The loss of the current batch.
         '''
-        state_batch, action_batch, reward_batch, next_state_batch, legal_actions_batch, done_batch = self.memory.sample() # 从 memory 中获取 batch_size 大小的数据
+        state_batch, action_batch, reward_batch, next_state_batch, legal_mask_batch, done_batch = self.memory.sample() # 从 memory 中获取 batch_size 大小的数据
 
         # Calculate best next actions using Q-network (Double DQN)
         q_values_next = self.q_estimator.predict_nograd(next_state_batch)
-        legal_actions = []
-        for b in range(self.batch_size):
-            legal_actions.extend([i + b * self.num_actions for i in legal_actions_batch[b]])
-        masked_q_values = -np.inf * np.ones(self.num_actions * self.batch_size, dtype=float)
-        masked_q_values[legal_actions] = q_values_next.flatten()[legal_actions]
-        masked_q_values = masked_q_values.reshape((self.batch_size, self.num_actions))
+        masked_q_values = np.where(legal_mask_batch, q_values_next, -np.inf)
         best_actions = np.argmax(masked_q_values, axis=1)
 
         # Evaluate best next actions using Target-network (Double DQN)
@@ -234,7 +263,7 @@ class DQNAgent(object):
             action (int): the performed action ID
             reward (float): the reward received
             next_state (numpy.array): the next state after performing the action
-            legal_actions (list): the legal actions of the next state
+            legal_actions (numpy.array): the legal action mask of the state
             done (boolean): whether the episode is finished
         '''
         self.memory.save(state, action, reward, next_state, legal_actions, done)
@@ -385,13 +414,16 @@ class Memory(object):
     ''' Memory for saving transitions
     '''
 
-    def __init__(self, memory_size, batch_size):
+    def __init__(self, memory_size, batch_size, packed=False):
         ''' Initialize
         Args:
             memory_size (int): the size of the memroy buffer
+            packed (boolean): Whether to keep the 0/1 states as bits, 8 times smaller
         '''
         self.memory_size = memory_size
         self.batch_size = batch_size
+        self.packed = packed
+        self.state_size = None
         self.memory = []
 
     def save(self, state, action, reward, next_state, legal_actions, done):
@@ -402,11 +434,15 @@ class Memory(object):
             action (int): the performed action ID
             reward (float): the reward received
             next_state (numpy.array): the next state after performing the action
-            legal_actions (list): the legal actions of the next state
+            legal_actions (numpy.array): the legal action mask of the state
             done (boolean): whether the episode is finished
         '''
         if len(self.memory) == self.memory_size:
             self.memory.pop(0)
+        if self.packed:
+            self.state_size = len(state)
+            state = np.packbits(np.asarray(state, dtype=np.uint8))
+            next_state = np.packbits(np.asarray(next_state, dtype=np.uint8))
         transition = Transition(state, action, reward, next_state, legal_actions, done)
         self.memory.append(transition)
 
@@ -421,7 +457,12 @@ class Memory(object):
             done_batch (list): a batch of dones
         '''
         samples = random.sample(self.memory, self.batch_size)
-        return map(np.array, zip(*samples))
+        if not self.packed:
+            return map(np.array, zip(*samples))
+        state_batch, action_batch, reward_batch, next_state_batch, legal_mask_batch, done_batch = map(np.array, zip(*samples))
+        state_batch = np.unpackbits(state_batch, axis=-1, count=self.state_size).astype(int)
+        next_state_batch = np.unpackbits(next_state_batch, axis=-1, count=self.state_size).astype(int)
+        return state_batch, action_batch, reward_batch, next_state_batch, legal_mask_batch, done_batch
 
 def copy_model_parameters(sess, estimator1, estimator2):
     ''' Copys the model parameters of one estimator to another.
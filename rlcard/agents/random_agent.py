@@ -24,7 +24,7 @@ class RandomAgent(object):
         Returns:
             action (int): The action predicted (randomly chosen) by the random agent
         '''
-        return np.random.choice(list(state['legal_actions'].keys()))
+        return np.random.choice(state['legal_ids'])
 
     def eval_step(self, state):
         ''' Predict the action given the current state for evaluation.
@@ -37,11 +37,33 @@ class RandomAgent(object):
             action (int): The action predicted (randomly chosen) by the random agent
             probs (list): The list of action probabilities
         '''
-        probs = [0 for _ in range(self.num_actions)]
-        for i in state['legal_actions']:
-            probs[i] = 1/len(state['legal_actions'])  # type: ignore
+        legal_ids = state['legal_ids']
+        probs = np.zeros(self.num_actions)
+        probs[legal_ids] = 1 / len(legal_ids)
 
         info = {}
-        info['probs'] = {state['raw_legal_actions'][i]: probs[list(state['legal_actions'].keys())[i]] for i in range(len(state['legal_actions']))}
+        info['probs'] = {state['raw_legal_actions'][i]: float(probs[legal_ids[i]]) for i in range(len(legal_ids))}
 
         return self.step(state), info
+
+    @staticmethod
+    def batch_step(x, z, legal_mask):
+        ''' Choose a legal action uniformly at random for each of a batch of states
+
+        Args:
+            x (numpy.array): (N, ...) the x_batch of the states, unused
+            z (numpy.array): (N, ...) the z_batch of the states, unused
+            legal_mask (numpy.array): (N, num_actions) the legal actions
+
+        Returns:
+            (numpy.array): The action id of each state
+        '''
+        return np.argmax(np.random.rand(*legal_mask.shape) * legal_mask, axis=1)
+
+    def batch_eval_step(self, x, z, legal_mask):
+        ''' The same as batch_step
+
+        Returns:
+            (numpy.array): The action id of each state
+        '''
+        return self.batch_step(x, z, legal_mask)
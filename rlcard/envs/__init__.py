@@ -6,4 +6,6 @@ from rlcard.envs.registration import register, make
 register(
     env_id='uno',
     entry_point='rlcard.envs.uno:UnoEnv',
-)
\ No newline at end of file
+)
+
+from rlcard.envs.vector_uno import VectorUnoEnv, SubprocVectorUnoEnv, AsyncUnoEnvPool
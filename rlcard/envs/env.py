@@ -28,9 +28,9 @@ class Env(object):
         self.action_recorder = []
 
         # Game specific configurations
-        # Currently only support blackjack、limit-holdem、no-limit-holdem
+        # Currently only support blackjack、limit-holdem、no-limit-holdem、uno
         # TODO support game configurations for all the games
-        supported_envs = ['blackjack', 'leduc-holdem', 'limit-holdem', 'no-limit-holdem']
+        supported_envs = ['blackjack', 'leduc-holdem', 'limit-holdem', 'no-limit-holdem', 'uno']
         if self.name in supported_envs: # type: ignore # 将 config 的配置替换 default_game_config
             _game_config = self.default_game_config.copy()  # type: ignore
             for key in config:
@@ -45,6 +45,9 @@ class Env(object):
         # A counter for the timesteps
         self.timestep = 0
 
+        # False to leave the raw fields out of the extracted states —— 是否在编码后的 state 中保留原始字段
+        self.raw_fields = True
+
         # Set random seed, default is None
         self.seed(config['seed'])
 
@@ -101,12 +104,30 @@ class Env(object):
 
         if not self.game.step_back():  # type: ignore
             return False
+        self.action_recorder.pop()
 
         player_id = self.get_player_id()
         state = self.get_state(player_id)
 
         return state, player_id
 
+    def clone(self, copy_rng=False):
+        ''' Copy the environment with its current game
+
+        Args:
+            copy_rng (boolean): True to give the game of the clone its own copy of the random state
+
+        Returns:
+            (Env): A new environment that continues from the current state. The
+              agents are shared with the original one
+        '''
+        env = self.__class__.__new__(self.__class__)
+        env.__dict__.update(self.__dict__)
+        env.game = self.game.clone(copy_rng)  # type: ignore
+        env.np_random = env.game.np_random
+        env.action_recorder = list(self.action_recorder)
+        return env
+
     def set_agents(self, agents):
         '''
         Set the agents that will interact with the environment.
@@ -117,22 +138,40 @@ class Env(object):
         '''
         self.agents = agents
 
-    def run(self, is_training=False):
+    def run(self, is_training=False, light=False, pack=False, columns=None):
         '''
         Run a complete game, either for evaluation or training RL agent.
 
         Args:
             is_training (boolean): True if for training purpose.
+            light (boolean): True to record only x_batch, z_batch and legal_mask of each
+              decision. The raw fields of the states are not built unless a raw agent is
+              seated or the agents are evaluated, and the final states of the players
+              are one shared all-zero record instead of a get_state for every player.
+            pack (boolean): True to record the light states with x_batch and z_batch
+              packed into 'obs' by pack_obs
+            columns (TrajectoryColumns): Columns to write the decisions into instead of
+              the trajectories, the raw fields are handled as with light
 
         Returns:
             (tuple) Tuple containing:
 
-                (list): A list of trajectories generated from the environment.
+                (list): A list of trajectories generated from the environment, or columns if given.
                 (list): A list payoffs. Each entry corresponds to one player.
 
         Note: The trajectories are 3-dimension list. The first dimension is for different players.
               The second dimension is for different transitions. The third dimension is for the contents of each transiton
         '''
+        if light or columns is not None:
+            raw_fields = self.raw_fields
+            self.raw_fields = not is_training or any(agent.use_raw for agent in self.agents)
+            try:
+                if columns is not None:
+                    return self._run_columns(is_training, columns)
+                return self._run_light(is_training, pack)
+            finally:
+                self.raw_fields = raw_fields
+
         trajectories = [[] for _ in range(self.num_players)]
         state, player_id = self.reset() # 重置一局游戏的 玩家 state 和 id
 
@@ -173,6 +212,83 @@ class Env(object):
             
         return trajectories, payoffs
 
+    def _run_light(self, is_training, pack):
+        ''' Run a complete game for run(light=True)
+        '''
+        trajectories = [[] for _ in range(self.num_players)]
+        state, player_id = self.reset()
+
+        # Loop to play the game
+        trajectories[player_id].append(self._get_light_state(state, pack))
+        while not self.is_over():
+            agent = self.agents[player_id]
+            if not is_training:
+                action, _ = agent.eval_step(state)
+            else:
+                action = agent.step(state)
+
+            state, next_player_id = self.step(action, agent.use_raw)
+            trajectories[player_id].append(action)
+            player_id = next_player_id
+
+            if not self.game.is_over(): # type: ignore
+                trajectories[player_id].append(self._get_light_state(state, pack))
+
+        # the final states are never acted on, one zero record stands for all of them —— 终局状态不参与决策，共用一个全 0 记录
+        final_state = self._get_light_state(state, pack)
+        final_state = {key: np.zeros_like(value) for key, value in final_state.items()}
+        for player_id in range(self.num_players):
+            trajectories[player_id].append(final_state)
+
+        # Payoffs
+        if not is_training:
+            payoffs = self.get_payoffs()
+        else:
+            payoffs = self.get_scores()
+
+        return trajectories, payoffs
+
+    def _run_columns(self, is_training, columns):
+        ''' Run a complete game for run(columns=...)
+        '''
+        columns.reset()
+        state, player_id = self.reset()
+
+        # Loop to play the game
+        while not self.is_over():
+            agent = self.agents[player_id]
+            columns.add(player_id, state)
+            if not is_training:
+                action, _ = agent.eval_step(state)
+            else:
+                action = agent.step(state)
+            columns.set_action(player_id, self._encode_action(action) if agent.use_raw else action)
+            state, player_id = self.step(action, agent.use_raw)
+
+        # Payoffs
+        if not is_training:
+            payoffs = self.get_payoffs()
+        else:
+            payoffs = self.get_scores()
+        columns.finish(payoffs)
+
+        return columns, payoffs
+
+    @staticmethod
+    def _get_light_state(state, pack):
+        ''' Keep the arrays of an extracted state that RL agents learn from
+
+        Args:
+            state (dict): The extracted state
+            pack (boolean): True to pack x_batch and z_batch into 'obs'
+
+        Returns:
+            (dict): x_batch, z_batch or obs, and legal_mask
+        '''
+        if pack:
+            return {'obs': pack_obs(state['x_batch'], state['z_batch']), 'legal_mask': state['legal_mask']}
+        return {'x_batch': state['x_batch'], 'z_batch': state['z_batch'], 'legal_mask': state['legal_mask']}
+
     def is_over(self):
         ''' Check whether the curent game is over
 
@@ -297,6 +413,19 @@ class Env(object):
         '''
         raise NotImplementedError
 
+    def _encode_action(self, action):
+        ''' Encode an action in the game to its id, the inverse of _decode_action.
+
+        Args:
+            action (string): The action in the game
+
+        Returns:
+            (int): The id of the action
+
+        Note: Must be implemented in the child class.
+        '''
+        raise NotImplementedError
+
     def _get_legal_actions(self):
         ''' Get all legal actions for current state.
 
@@ -3,12 +3,18 @@ from collections import OrderedDict
 
 from rlcard.envs import Env
 from rlcard.games.uno import Game
-from rlcard.games.uno.utils import encode_hand_old, encode_hand, encode_other_cards, encode_target, encode_action_sequence_8, encode_action_sequence_12, get_one_hot_array
-from rlcard.games.uno.utils import ACTION_SPACE, ACTION_LIST
-from rlcard.games.uno.utils import cards2list
+from rlcard.envs.uno_schema import SCHEMA_300, SCHEMA_430, get_schema
+from rlcard.games.uno.utils import ACTION_SPACE, ACTION_LIST, NO_ACTION, ACTION_ONE_HOT
+from rlcard.games.uno.utils import cards2list, faces2list
+
+# the number of recent actions kept by the ring buffer and UnoEnv.to_bytes, enough for the 12 action history
+NUM_RECENT_ACTIONS = 12
+# RECENT_ORDER[head] lists the ring buffer from the oldest to the newest action
+RECENT_ORDER = (np.arange(NUM_RECENT_ACTIONS)[:, None] + np.arange(NUM_RECENT_ACTIONS)[None, :]) % NUM_RECENT_ACTIONS
 
 DEFAULT_GAME_CONFIG = {
         'game_num_players': 2,
+        'game_num_shuffled_decks': 0, # > 0 to shuffle that many decks at once, see UnoGame.num_shuffled_decks
         }
 
 class UnoEnv(Env):
@@ -18,56 +24,49 @@ class UnoEnv(Env):
         self.default_game_config = DEFAULT_GAME_CONFIG
         self.game = Game()
         super().__init__(config)
-        self.state_shape = [[300], [300]]
+        # the layout of x_batch and z_batch, a name in SCHEMAS or an ObsSchema
+        self.obs_schema = get_schema(config.get('obs_schema', '300'))
+        self.state_shape = [list(self.obs_schema.shape) for _ in range(self.num_players)]
         self.action_shape = [None for _ in range(self.num_players)]
+        # dtype of x_batch and z_batch, np.int8 cuts their size by 8
+        self.obs_dtype = config.get('obs_dtype', int)
+        # > 0 to write the observations into that many preallocated buffers in turn,
+        # an observation is then only valid until that many more have been extracted,
+        # 2 keeps the previous observation valid for (state, next_state) pairs
+        self.num_obs_buffers = config.get('num_obs_buffers', 0)
+        self._obs_buffers = {}
+        self._obs_slot = 0
+        self._action_one_hot = ACTION_ONE_HOT.astype(self.obs_dtype)
+        self._reset_recent_actions()
 
     def _extract_state_300(self, state):
-        current_hand = encode_hand(state['hand']) # obs[0] - obs[2] 记录玩家当前手牌
-        target_card = encode_target(state['target']) # obs[3] 记录当前牌面牌值
-        other_cards = encode_hand(state['other_cards']) # obs[4] - obs[6] 记录剩余牌型
-        
-        last_8_actions = encode_action_sequence_8(self._process_action_seq(8)) # obs[8] - obs[13] 记录最近 6 步 actions
-        
-        my_num_cards_left = get_one_hot_array(state['num_cards'][self.get_player_id()], 10) # obs[14] 记录自己剩余手牌数
-        other_num_cards_left = get_one_hot_array(state['num_cards'][1 - self.get_player_id()], 10) # obs[15] 记录对手剩余手牌数
-        
-        x_batch = np.concatenate((current_hand,
-                              target_card,
-                              other_cards,
-                              my_num_cards_left,
-                              other_num_cards_left))
-
-        legal_action_id = self._get_legal_actions() # 记录当前玩家对应当前牌面所有 legal_actions 的 id
-        extracted_state = {'x_batch': x_batch, 'z_batch': last_8_actions, 'legal_actions': legal_action_id} # 记录编码后的 obs 和 legal_action_id 值
-        extracted_state['raw_obs'] = state # 记录原始 state 值
-        extracted_state['raw_legal_actions'] = [a for a in state['legal_actions']] # 记录原始 legal_actions 值
-        extracted_state['action_record'] = self.action_recorder # 记录 action_recorder 值
-        return extracted_state
-    
+
+        return self._encode_state(state, SCHEMA_300)
+
     def _extract_state_430(self, state):
-        current_hand = encode_hand(state['hand']) # obs[0] - obs[2] 记录玩家当前手牌
-        teammate_hand = np.zeros(110, dtype=int) # obs[3] - obs[5] 记录队友当前手牌
-        target_card = encode_target(state['target']) # obs[6] 记录当前牌面牌值
-        other_cards = encode_hand(state['other_cards']) # obs[7] - obs[9] 记录剩余牌型
-        
-        last_12_actions = encode_action_sequence_12(self._process_action_seq(12)) # obs[10] - obs[21] 记录最近 10 步 actions
-        
-        my_num_cards_left = get_one_hot_array(state['num_cards'][self.get_player_id()]) # obs_x[10] 记录自己剩余手牌数
-        teammate_num_cards_left = get_one_hot_array(state['num_cards'][(self.get_player_id() + 2) % self.num_players]) # obs_x[11] 记录队友剩余手牌数
-        oppo1_num_cards_left = get_one_hot_array(state['num_cards'][(self.get_player_id() + 1) % self.num_players]) # obs_x[12] 记录左边对手剩余手牌数
-        oppo2_num_cards_left = get_one_hot_array(state['num_cards'][(self.get_player_id() + 3) % self.num_players]) # obs_x[13] 记录右边对手剩余手牌数
-        
-        x_batch = np.concatenate((current_hand,
-                              teammate_hand,
-                              target_card,
-                              other_cards,
-                              my_num_cards_left,
-                              teammate_num_cards_left,
-                              oppo1_num_cards_left,
-                              oppo2_num_cards_left))
-
-        legal_action_id = self._get_legal_actions() # 记录当前玩家对应当前牌面所有 legal_actions 的 id
-        extracted_state = {'x_batch': x_batch, 'z_batch': last_12_actions, 'legal_actions': legal_action_id} # 记录编码后的 obs 和 legal_action_id 值
+
+        return self._encode_state(state, SCHEMA_430)
+
+    def _encode_state(self, state, schema):
+        ''' Encode a raw state with an observation schema, the features are written
+        into one array instead of being concatenated
+
+        Args:
+            state (dict): The raw state
+            schema (ObsSchema): The layout of the observation
+
+        Returns:
+            (dict): The extracted state
+        '''
+        x_batch = schema.encode(state, self.get_player_id(), self._get_obs_array('x_batch', schema.shape))
+        z_batch = self._encode_recent_actions(state, schema.history, schema.z_shape) # 记录最近 history 步 actions
+
+        legal_mask = self.game.get_legal_mask() # 当前玩家的合法动作掩码
+        legal_ids = np.flatnonzero(legal_mask) # 当前玩家所有 legal_actions 的 id，按 id 升序
+        extracted_state = {'x_batch': x_batch, 'z_batch': z_batch, 'legal_mask': legal_mask, 'legal_ids': legal_ids}
+        if not self.raw_fields: # 只保留 RL 智能体需要的数组
+            return extracted_state
+        extracted_state['legal_actions'] = OrderedDict.fromkeys(legal_ids.tolist()) # 记录 legal_action_id 值
         extracted_state['raw_obs'] = state # 记录原始 state 值
         extracted_state['raw_legal_actions'] = [a for a in state['legal_actions']] # 记录原始 legal_actions 值
         extracted_state['action_record'] = self.action_recorder # 记录 action_recorder 值
@@ -85,26 +84,157 @@ class UnoEnv(Env):
         
         return np.array(self.game.get_scores())
 
+    def step(self, action, raw_action=False):
+        ''' Step forward, actions of non-raw agents go to the game by id
+
+        Args:
+            action (int): The action taken by the current player
+            raw_action (boolean): True if the action is a raw action
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (dict): The next state
+                (int): The ID of the next player
+        '''
+        if raw_action:
+            action_id = ACTION_SPACE[action]
+        else:
+            action_id = self._decode_action_id(action)
+        self.timestep += 1
+        self.action_recorder.append((self.get_player_id(), ACTION_LIST[action_id])) # 记录对应玩家采取的动作
+        self._record_action(action_id)
+        next_state, player_id = self.game.step_id(action_id)
+        return self._extract_state(next_state), player_id
+
+    def reset(self):
+        self.action_recorder = []
+        self._reset_recent_actions()
+        return super().reset()
+
+    def clone(self, copy_rng=False):
+        env = super().clone(copy_rng)
+        env.recent_actions = self.recent_actions.copy()
+        env._obs_buffers = {}
+        return env
+
+    def to_bytes(self, with_rng=False):
+        ''' Serialize the current game and the recent actions
+
+        Args:
+            with_rng (boolean): True to keep the random state of the game
+
+        Returns:
+            (bytes): The last actions as (player id, action id) pairs, -1 padded, followed by UnoGame.to_bytes
+        '''
+        recent = np.full((NUM_RECENT_ACTIONS, 2), -1, dtype=np.int8)
+        records = self.action_recorder[-NUM_RECENT_ACTIONS:]
+        if records:
+            recent[-len(records):] = [(player_id, ACTION_SPACE[action]) for player_id, action in records]
+        return recent.tobytes() + self.game.to_bytes(with_rng)
+
+    def load_bytes(self, data):
+        ''' Continue from a buffer of to_bytes, the agents and the config are kept
+
+        Args:
+            data (bytes): A buffer from to_bytes
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (dict): The state of the current player
+                (int): The ID of the current player
+        '''
+        offset = NUM_RECENT_ACTIONS * 2
+        recent = np.frombuffer(data[:offset], dtype=np.int8).reshape(NUM_RECENT_ACTIONS, 2)
+        self.game = Game.from_bytes(data[offset:], self.np_random)
+        self.np_random = self.game.np_random
+        self.action_recorder = [(int(player_id), ACTION_LIST[action_id]) for player_id, action_id in recent if player_id >= 0]
+        self._reset_recent_actions()
+        player_id = self.get_player_id()
+        return self.get_state(player_id), player_id
+
     def _decode_action(self, action_id):
-        legal_ids = self._get_legal_actions()
-        if action_id in legal_ids:
-            return ACTION_LIST[action_id]
-        
-        return ACTION_LIST[np.random.choice(legal_ids)]  # type: ignore
+
+        return ACTION_LIST[self._decode_action_id(action_id)]
+
+    def _decode_action_id(self, action_id):
+        legal_mask = self.game.get_legal_mask()
+        if 0 <= action_id < len(legal_mask) and legal_mask[action_id]:
+            return int(action_id)
+
+        return int(np.random.choice(np.flatnonzero(legal_mask)))
+
+    def _encode_action(self, action):
+
+        return ACTION_SPACE[action]
 
     def _get_legal_actions(self):
-        legal_actions = self.game.get_legal_actions()
-        legal_ids = {ACTION_SPACE[action]: None for action in legal_actions} # 获取当前 legal_actions 的所有 id
-        return OrderedDict(legal_ids)
-
-    def _process_action_seq(self, length):
-        sequence = [action[1] for action in self.action_recorder[-length:]]
-        if len(sequence) < length:
-            empty_sequence = ['' for _ in range(length - len(sequence))]
-            empty_sequence.extend(sequence)
-            sequence = empty_sequence
-        return sequence
-        
+        legal_mask = self.game.get_legal_mask()
+        return OrderedDict.fromkeys(np.flatnonzero(legal_mask).tolist()) # 获取当前 legal_actions 的所有 id
+
+    def _record_action(self, action_id):
+        self.recent_actions[self.recent_head] = action_id
+        self.recent_head = (self.recent_head + 1) % NUM_RECENT_ACTIONS
+        self.num_recorded += 1
+
+    def _reset_recent_actions(self):
+        ''' Refill the ring buffer of recent action ids from action_recorder
+        '''
+        self.recent_actions = np.full(NUM_RECENT_ACTIONS, NO_ACTION, dtype=np.intp)
+        self.recent_head = 0
+        self.num_recorded = 0
+        for _, action in self.action_recorder[-NUM_RECENT_ACTIONS:]:
+            self._record_action(ACTION_SPACE[action])
+        self.num_recorded = len(self.action_recorder)
+
+    def _encode_recent_actions(self, state, length, shape):
+        ''' Encode the last actions the same way as encode_action_sequence_8 / 12,
+        their ids are kept in state['recent_actions'] for encode_batch
+
+        Args:
+            state (dict): The raw state
+            length (int): The number of actions, 8 or 12
+            shape (tuple): The shape of the encoded actions
+
+        Returns:
+            (numpy.array): The one-hot rows of the actions from the oldest to the newest
+        '''
+        if self.num_recorded != len(self.action_recorder): # step_back 撤销了动作，重建环形缓冲
+            self._reset_recent_actions()
+        action_ids = self.recent_actions[RECENT_ORDER[self.recent_head, NUM_RECENT_ACTIONS - length:]]
+        state['recent_actions'] = action_ids
+        out = self._get_obs_array('z_batch', shape, clear=False)
+        np.take(self._action_one_hot, action_ids, axis=0, out=out.reshape(length, -1))
+        return out
+
+    def _extract_state(self, state):
+        if self.num_obs_buffers:
+            self._obs_slot = (self._obs_slot + 1) % self.num_obs_buffers
+        return self._encode_state(state, self.obs_schema)
+
+    def _get_obs_array(self, key, shape, clear=True):
+        ''' Get an array for a feature of the current observation, the buffer of the
+        current slot if observations are written into buffers, a new array otherwise
+
+        Args:
+            key (str): The name of the feature
+            shape (tuple): The shape of the feature
+            clear (boolean): True to fill the array with zeros
+
+        Returns:
+            (numpy.array): The array of dtype obs_dtype
+        '''
+        if not self.num_obs_buffers:
+            return np.zeros(shape, dtype=self.obs_dtype) if clear else np.empty(shape, dtype=self.obs_dtype)
+        buffers = self._obs_buffers.get(key)
+        if buffers is None or buffers.shape[1:] != shape:
+            buffers = self._obs_buffers[key] = np.zeros((self.num_obs_buffers,) + shape, dtype=self.obs_dtype)
+        out = buffers[self._obs_slot]
+        if clear:
+            out[:] = 0
+        return out
+
     def get_perfect_information(self):
         ''' Get the perfect information of the current state
 
@@ -115,9 +245,36 @@ class UnoEnv(Env):
         state['num_players'] = self.num_players
         state['hand_cards'] = [cards2list(player.hand)
                                for player in self.game.players]
-        state['played_cards'] = cards2list(self.game.round.played_cards)
-        state['target'] = self.game.round.target.str  # type: ignore
+        state['played_cards'] = faces2list(self.game.round.played_cards)
+        state['target'] = ACTION_LIST[self.game.round.target]  # type: ignore
         state['current_player'] = self.game.round.current_player
         state['legal_actions'] = self.game.round.get_legal_actions(
             self.game.players, state['current_player'])
         return state
+
+
+def encode_batch(raw_states, dtype=int, schema=SCHEMA_300):
+    ''' Encode many raw states at once into the layout of an observation schema
+
+    Args:
+        raw_states (list): Raw states extracted by UnoEnv with the same schema, they keep
+          the ids of the last actions in 'recent_actions'
+        dtype (type): The dtype of x and z
+        schema (ObsSchema): The layout of the observations, that of UnoEnv._extract_state_300 by default
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (numpy.array): x of shape (N, schema.size)
+            (numpy.array): z of shape (N, *schema.z_shape)
+            (numpy.array): legal_mask of shape (N, 63)
+    '''
+    x = schema.encode_batch(np.stack([state['hand_counts'] for state in raw_states]),
+                            np.array([state['target_id'] for state in raw_states]),
+                            np.stack([state['unseen_counts'] for state in raw_states]),
+                            np.array([state['num_cards'] for state in raw_states]),
+                            np.array([state['current_player'] for state in raw_states]),
+                            dtype)
+    z = schema.encode_actions_batch(np.stack([state['recent_actions'] for state in raw_states]), dtype)
+    legal_mask = np.stack([state['legal_mask'] for state in raw_states])
+    return x, z, legal_mask
@@ -0,0 +1,175 @@
+import numpy as np
+
+from rlcard.games.uno.utils import NUM_FACES, NUM_ACTIONS, ACTION_ONE_HOT
+from rlcard.games.uno.utils import encode_hand_counts, encode_hand_counts_batch, get_one_hot_index, get_one_hot_indices
+
+# the number of features written by each kind of block —— 每类特征块的长度
+BLOCK_SIZES = {
+    'counts': 110, # 按牌型计数的 3 个平面，arg 为 raw state 中计数向量的字段名
+    'target': NUM_FACES, # 当前牌面 one-hot
+    'num_cards': 10, # 玩家剩余手牌数 one-hot，arg 为相对当前玩家的座位
+    'zeros': None, # 始终为 0 的占位，arg 为长度
+}
+
+
+class ObsBlock:
+    ''' A named slice of x and the feature written into it
+    '''
+
+    def __init__(self, name, kind, arg, offset):
+        if kind not in BLOCK_SIZES:
+            raise ValueError('Unknown block kind {}'.format(kind))
+        self.name = name
+        self.kind = kind
+        self.arg = arg
+        self.offset = offset
+        self.size = arg if kind == 'zeros' else BLOCK_SIZES[kind]
+        self.stop = offset + self.size
+
+    def __repr__(self):
+        return 'ObsBlock({}, {}, [{}:{}])'.format(self.name, self.kind, self.offset, self.stop)
+
+
+class ObsSchema:
+    ''' The layout of an observation, x is a list of named blocks laid end to end
+    and z holds the one-hot ids of the last actions
+
+    Blocks are given as (name, kind, arg) in the order of x, see BLOCK_SIZES for the kinds.
+    '''
+
+    def __init__(self, blocks, history=8, z_shape=(4, 126)):
+        ''' Lay out the blocks
+
+        Args:
+            blocks (list): (name, kind, arg) of each block
+            history (int): The number of recent actions in z, at most 12
+            z_shape (tuple): The shape of z, it holds history * 63 entries
+        '''
+        if history * NUM_ACTIONS != int(np.prod(z_shape)):
+            raise ValueError('z of shape {} does not hold {} actions'.format(z_shape, history))
+        self.blocks = []
+        offset = 0
+        for name, kind, arg in blocks:
+            block = ObsBlock(name, kind, arg, offset)
+            self.blocks.append(block)
+            offset = block.stop
+        self.size = offset
+        self.shape = (self.size,)
+        self.history = history
+        self.z_shape = tuple(z_shape)
+        self.offsets = {block.name: (block.offset, block.stop) for block in self.blocks}
+
+        # the blocks by kind, so that encode writes each of them with one call
+        self._counts = [(block.arg, block.offset, block.stop) for block in self.blocks if block.kind == 'counts']
+        self._targets = [block.offset for block in self.blocks if block.kind == 'target']
+        self._num_cards = [(block.arg, block.offset) for block in self.blocks if block.kind == 'num_cards']
+
+    def encode(self, state, player_id, x):
+        ''' Write the features of a raw state into x in place
+
+        Args:
+            state (dict): The raw state of UnoGame.get_state
+            player_id (int): The seat the num_cards blocks are counted from
+            x (numpy.array): A zeroed array of shape (size,)
+
+        Returns:
+            (numpy.array): x
+        '''
+        for field, start, stop in self._counts:
+            encode_hand_counts(state[field], x[start:stop])
+        for start in self._targets:
+            x[start + state['target_id']] = 1
+        num_cards = state['num_cards']
+        for seat, start in self._num_cards:
+            x[start + get_one_hot_index(num_cards[(player_id + seat) % len(num_cards)], 10)] = 1
+        return x
+
+    def encode_batch(self, hand_counts, target, unseen_counts, num_cards, player_id, dtype=int):
+        ''' Write the features of N states into one stacked x
+
+        Args:
+            hand_counts (numpy.array): (N, 54) the cards of each type in hand
+            target (numpy.array): (N,) the face id of the target
+            unseen_counts (numpy.array): (N, 54) the unseen cards of each type
+            num_cards (numpy.array): (N, num_players) the number of cards of each player
+            player_id (numpy.array): (N,) the seat the num_cards blocks are counted from
+            dtype (type): The dtype of x
+
+        Returns:
+            (numpy.array): x of shape (N, size)
+        '''
+        num = len(target)
+        rows = np.arange(num)
+        fields = {'hand_counts': hand_counts, 'unseen_counts': unseen_counts}
+        x = np.zeros((num, self.size), dtype=dtype)
+        for field, start, stop in self._counts:
+            encode_hand_counts_batch(fields[field], x[:, start:stop])
+        for start in self._targets:
+            x[rows, start + target] = 1
+        num_players = num_cards.shape[1]
+        for seat, start in self._num_cards:
+            x[rows, start + get_one_hot_indices(num_cards[rows, (player_id + seat) % num_players], 10)] = 1
+        return x
+
+    def encode_actions_batch(self, recent_actions, dtype=int):
+        ''' Encode the ids of the last actions of N states into a stacked z
+
+        Args:
+            recent_actions (numpy.array): (N, history) the action ids from the oldest, NO_ACTION for none
+            dtype (type): The dtype of z
+
+        Returns:
+            (numpy.array): z of shape (N, *z_shape)
+        '''
+        return ACTION_ONE_HOT.astype(dtype)[recent_actions].reshape((len(recent_actions),) + self.z_shape)
+
+
+# the layout of UnoEnv._extract_state_300
+SCHEMA_300 = ObsSchema([
+    ('hand', 'counts', 'hand_counts'), # obs[0] - obs[2] 玩家当前手牌
+    ('target', 'target', None), # obs[3] 当前牌面牌值
+    ('unseen', 'counts', 'unseen_counts'), # obs[4] - obs[6] 剩余牌型
+    ('my_num_cards', 'num_cards', 0), # 自己剩余手牌数
+    ('other_num_cards', 'num_cards', 1), # 对手剩余手牌数
+], history=8, z_shape=(4, 126))
+
+# the layout of UnoEnv._extract_state_430, shared with the 4-player models
+SCHEMA_430 = ObsSchema([
+    ('hand', 'counts', 'hand_counts'), # obs[0] - obs[2] 玩家当前手牌
+    ('teammate_hand', 'zeros', 110), # obs[3] - obs[5] 队友当前手牌，均为 0
+    ('target', 'target', None), # obs[6] 当前牌面牌值
+    ('unseen', 'counts', 'unseen_counts'), # obs[7] - obs[9] 剩余牌型
+    ('my_num_cards', 'num_cards', 0), # 自己剩余手牌数
+    ('teammate_num_cards', 'num_cards', 2), # 队友剩余手牌数
+    ('next_num_cards', 'num_cards', 1), # 下家剩余手牌数
+    ('prev_num_cards', 'num_cards', 3), # 上家剩余手牌数
+], history=12, z_shape=(3, 252))
+
+# a smaller layout without the unseen cards
+SCHEMA_190 = ObsSchema([
+    ('hand', 'counts', 'hand_counts'),
+    ('target', 'target', None),
+    ('my_num_cards', 'num_cards', 0),
+    ('other_num_cards', 'num_cards', 1),
+], history=8, z_shape=(4, 126))
+
+SCHEMAS = {
+    '300': SCHEMA_300,
+    '430': SCHEMA_430,
+    '190': SCHEMA_190,
+}
+
+def get_schema(schema):
+    ''' Get an observation schema
+
+    Args:
+        schema (str or ObsSchema): The name of a schema in SCHEMAS, or a schema
+
+    Returns:
+        (ObsSchema): The schema
+    '''
+    if isinstance(schema, ObsSchema):
+        return schema
+    if schema not in SCHEMAS:
+        raise ValueError('Unknown observation schema {}'.format(schema))
+    return SCHEMAS[schema]
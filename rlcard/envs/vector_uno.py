@@ -0,0 +1,564 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from rlcard.envs.registration import make
+
+
+def get_layout(env):
+    ''' Get the arrays a vectorized env writes for each game
+
+    Args:
+        env (UnoEnv): One of the games
+
+    Returns:
+        (dict): The shape of one row and the dtype of x, z, legal_mask, player_id, reward and done
+    '''
+    return {
+        'x': (env.obs_schema.shape, np.dtype(env.obs_dtype)),
+        'z': (env.obs_schema.z_shape, np.dtype(env.obs_dtype)),
+        'legal_mask': ((env.num_actions,), np.dtype(bool)),
+        'player_id': ((), np.dtype(np.int64)),
+        'reward': ((env.num_players,), np.dtype(np.float32)),
+        'done': ((), np.dtype(bool)),
+    }
+
+
+class VectorUnoEnv:
+    ''' Step K UnoEnv games in lockstep and return their observations stacked
+
+    The observations of every game are written straight into the rows of x, z
+    and legal_mask, which are reused by every step. A finished game is reset
+    in the same step and its payoffs are returned in reward.
+    '''
+
+    def __init__(self, num_envs, config={}, is_training=True, arrays=None):
+        ''' Create the games
+
+        Args:
+            num_envs (int): The number of games K
+            config (dict): The config of each UnoEnv, game k is seeded with seed + k
+            is_training (boolean): True to reward with the scores as Env.run(is_training=True),
+              False with the payoffs
+            arrays (dict): Arrays to write x, z, legal_mask, player_id, reward and done
+              into, such as views of shared memory. They are allocated by default
+        '''
+        self.num_envs = num_envs
+        self.is_training = is_training
+        seed = config.get('seed')
+        self.envs = []
+        for k in range(num_envs):
+            env_config = dict(config)
+            env_config['seed'] = None if seed is None else seed + k
+            self.envs.append(make('uno', env_config))
+        env = self.envs[0]
+        self.num_players = env.num_players
+        self.num_actions = env.num_actions
+        self.state_shape = env.state_shape
+        self.z_shape = env.obs_schema.z_shape
+
+        # the rows of the stacked observations are the observation buffers of the games —— 每局游戏直接写入对应的行
+        if arrays is None:
+            arrays = {key: np.zeros((num_envs,) + shape, dtype=dtype) for key, (shape, dtype) in get_layout(env).items()}
+        self.x = arrays['x']
+        self.z = arrays['z']
+        self.legal_mask = arrays['legal_mask']
+        self.player_id = arrays['player_id']
+        self.reward = arrays['reward']
+        self.done = arrays['done']
+        for k, env in enumerate(self.envs):
+            env.num_obs_buffers = 1
+            env._obs_buffers = {'x_batch': self.x[k:k + 1], 'z_batch': self.z[k:k + 1]}
+            env.raw_fields = False
+        self.states = [None for _ in range(num_envs)]
+        self.agents = None
+
+    def set_agents(self, agents):
+        ''' Set the agents of step_agents, the raw fields are built if a raw agent is seated
+
+        Args:
+            agents (list): One agent per seat, shared by all games
+        '''
+        self.agents = agents
+        raw_fields = any(agent.use_raw for agent in agents)
+        for k, env in enumerate(self.envs):
+            if env.raw_fields != raw_fields:
+                env.raw_fields = raw_fields
+                if self.states[k] is not None: # 重新编码当前 state
+                    self.states[k] = env.get_state(env.get_player_id())
+
+    def reset(self):
+        ''' Start a new game in every slot
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (numpy.array): x of shape (K, *state_shape)
+                (numpy.array): z of shape (K, *z_shape)
+                (numpy.array): legal_mask of shape (K, num_actions)
+                (numpy.array): The id of the current player of each game
+        '''
+        for k in range(self.num_envs):
+            self.reset_env(k)
+        return self.x, self.z, self.legal_mask, self.player_id
+
+    def reset_env(self, k):
+        ''' Start a new game in slot k, its reward and done are cleared
+
+        Args:
+            k (int): The index of the game
+        '''
+        self._set_state(k, *self.envs[k].reset())
+        self.reward[k] = 0
+        self.done[k] = False
+
+    def step(self, actions, raw_action=False):
+        ''' Advance every game by one action, finished games are reset
+
+        Args:
+            actions (list): The action of the current player of each game
+            raw_action (boolean): True if the actions are raw actions
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (numpy.array): x of shape (K, *state_shape)
+                (numpy.array): z of shape (K, *z_shape)
+                (numpy.array): legal_mask of shape (K, num_actions)
+                (numpy.array): The id of the current player of each game
+                (numpy.array): reward of shape (K, num_players), the payoffs of the games that ended
+                (numpy.array): done of shape (K,), True for the games that ended and were reset
+        '''
+        self.reward[:] = 0
+        self.done[:] = False
+        for k in range(self.num_envs):
+            self.step_env(k, actions[k], raw_action)
+        return self.x, self.z, self.legal_mask, self.player_id, self.reward, self.done
+
+    def step_env(self, k, action, raw_action=False):
+        ''' Advance game k by one action, the payoffs are added to its reward if it
+        ends, then it is reset. reward and done are not cleared here
+
+        Args:
+            k (int): The index of the game
+            action (int): The action of the current player of the game
+            raw_action (boolean): True if the action is a raw action
+        '''
+        env = self.envs[k]
+        state, player_id = env.step(action, raw_action)
+        if env.is_over():
+            self.reward[k] += env.get_scores() if self.is_training else env.get_payoffs()
+            self.done[k] = True
+            state, player_id = env.reset()
+        self._set_state(k, state, player_id)
+
+    def step_agents(self, is_training=None):
+        ''' Let the agents act in every game and step, one batched call per seat
+
+        Agents with batch_step / batch_eval_step get the rows of the games where
+        they are to act, the others act on each state of those games.
+
+        Args:
+            is_training (boolean): True to call batch_step, False batch_eval_step,
+              the is_training of the env by default
+
+        Returns:
+            (tuple): The actions and then the results of step
+        '''
+        if is_training is None:
+            is_training = self.is_training
+        actions = np.zeros(self.num_envs, dtype=object)
+        for seat, agent in enumerate(self.agents):
+            rows = np.flatnonzero(self.player_id == seat)
+            if not len(rows):
+                continue
+            if agent.use_raw: # 原始动作转换为 id
+                for k in rows:
+                    action = agent.step(self.states[k]) if is_training else agent.eval_step(self.states[k])[0]
+                    actions[k] = self.envs[k]._encode_action(action)
+            elif hasattr(agent, 'batch_step'):
+                batch_step = agent.batch_step if is_training else agent.batch_eval_step
+                actions[rows] = batch_step(self.x[rows], self.z[rows], self.legal_mask[rows])
+            else:
+                for k in rows:
+                    actions[k] = agent.step(self.states[k]) if is_training else agent.eval_step(self.states[k])[0]
+        actions = actions.astype(np.int64)
+        return (actions,) + self.step(actions)
+
+    def _set_state(self, k, state, player_id):
+        ''' Keep the state of game k, x and z are already written into its rows
+        '''
+        self.states[k] = state
+        self.legal_mask[k] = state['legal_mask']
+        self.player_id[k] = player_id
+
+
+def get_slab_arrays(slab, layout, num_envs):
+    ''' View a shared slab as the arrays of a layout, each array starts on a 64-byte boundary
+
+    Args:
+        slab (object): A buffer such as multiprocessing.RawArray, None to get the size only
+        layout (dict): The row shape and dtype of each array, see get_layout
+        num_envs (int): The number of rows
+
+    Returns:
+        (tuple): The arrays by name, and the number of bytes of the slab
+    '''
+    arrays = {}
+    offset = 0
+    for key, (shape, dtype) in layout.items():
+        shape = (num_envs,) + tuple(shape)
+        size = int(np.prod(shape)) * dtype.itemsize
+        if slab is not None:
+            arrays[key] = np.frombuffer(slab, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+        offset += (size + 63) // 64 * 64
+    return arrays, offset
+
+def _subproc_worker(conn, slab, layout, num_envs, start, stop, config, is_training):
+    ''' Step the games [start, stop) of a SubprocVectorUnoEnv, their rows of the slab are written in place
+    '''
+    arrays, _ = get_slab_arrays(slab, layout, num_envs)
+    seed = config.get('seed')
+    config = dict(config)
+    if seed is not None:
+        config['seed'] = seed + start
+    # UnoRound draws the first player from the global random state, which a forked worker shares with the others
+    np.random.seed(None if seed is None else seed + start)
+    venv = VectorUnoEnv(stop - start, config, is_training, {key: array[start:stop] for key, array in arrays.items()})
+    try:
+        while True:
+            command, data = conn.recv()
+            if command == 'step':
+                venv.step(data)
+            elif command == 'reset':
+                venv.reset()
+            elif command == 'close':
+                break
+            conn.send(None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+class SubprocVectorUnoEnv:
+    ''' Step K UnoEnv games in worker processes, each worker steps a slice of the games
+
+    The observations, masks, rewards and dones of all games are in one shared slab
+    that the workers write their rows of. Only the action ids go through the pipes.
+    '''
+
+    def __init__(self, num_envs, num_workers=None, config={}, is_training=True, start_method=None):
+        ''' Start the workers
+
+        Args:
+            num_envs (int): The number of games K
+            num_workers (int): The number of worker processes, the number of CPUs by default
+            config (dict): The config of each UnoEnv, game k is seeded with seed + k
+            is_training (boolean): True to reward with the scores, False with the payoffs
+            start_method (str): The multiprocessing start method, the default of the platform by default
+        '''
+        env = make('uno', config)
+        self.num_envs = num_envs
+        self.num_players = env.num_players
+        self.num_actions = env.num_actions
+        self.state_shape = env.state_shape
+        self.z_shape = env.obs_schema.z_shape
+        self.num_workers = min(num_workers or mp.cpu_count(), num_envs)
+        self.is_training = is_training
+
+        layout = get_layout(env)
+        _, size = get_slab_arrays(None, layout, num_envs)
+        ctx = mp.get_context(start_method)
+        self.slab = ctx.RawArray('B', size)
+        arrays, _ = get_slab_arrays(self.slab, layout, num_envs)
+        self.x = arrays['x']
+        self.z = arrays['z']
+        self.legal_mask = arrays['legal_mask']
+        self.player_id = arrays['player_id']
+        self.reward = arrays['reward']
+        self.done = arrays['done']
+
+        # game k goes to worker k * num_workers // num_envs —— 每个进程负责连续的一段游戏
+        self.bounds = [num_envs * w // self.num_workers for w in range(self.num_workers + 1)]
+        self.conns = []
+        self.processes = []
+        for w in range(self.num_workers):
+            conn, worker_conn = ctx.Pipe()
+            process = ctx.Process(target=_subproc_worker,
+                                  args=(worker_conn, self.slab, layout, num_envs, self.bounds[w], self.bounds[w + 1], config, is_training),
+                                  daemon=True)
+            process.start()
+            worker_conn.close()
+            self.conns.append(conn)
+            self.processes.append(process)
+        self.closed = False
+
+    def reset(self):
+        ''' Start a new game in every slot
+
+        Returns:
+            (tuple): x, z, legal_mask and player_id as VectorUnoEnv.reset
+        '''
+        for conn in self.conns:
+            conn.send(('reset', None))
+        self._wait()
+        return self.x, self.z, self.legal_mask, self.player_id
+
+    def step(self, actions):
+        ''' Advance every game by one action, finished games are reset
+
+        Args:
+            actions (numpy.array): The action id of the current player of each game
+
+        Returns:
+            (tuple): x, z, legal_mask, player_id, reward and done as VectorUnoEnv.step
+        '''
+        actions = np.asarray(actions, dtype=np.int64)
+        for w, conn in enumerate(self.conns):
+            conn.send(('step', actions[self.bounds[w]:self.bounds[w + 1]]))
+        self._wait()
+        return self.x, self.z, self.legal_mask, self.player_id, self.reward, self.done
+
+    def step_agents(self, agents, is_training=None):
+        ''' Let agents with batch_step / batch_eval_step act in every game and step
+
+        Args:
+            agents (list): One agent per seat, raw agents cannot act on the slab
+            is_training (boolean): True to call batch_step, False batch_eval_step,
+              the is_training of the env by default
+
+        Returns:
+            (tuple): The actions and then the results of step
+        '''
+        if is_training is None:
+            is_training = self.is_training
+        actions = np.zeros(self.num_envs, dtype=np.int64)
+        for seat, agent in enumerate(agents):
+            if agent.use_raw or not hasattr(agent, 'batch_step'):
+                raise ValueError('Agent of seat {} cannot act on batched observations'.format(seat))
+            rows = np.flatnonzero(self.player_id == seat)
+            if len(rows):
+                batch_step = agent.batch_step if is_training else agent.batch_eval_step
+                actions[rows] = batch_step(self.x[rows], self.z[rows], self.legal_mask[rows])
+        return (actions,) + self.step(actions)
+
+    def close(self):
+        ''' Stop the workers
+        '''
+        if self.closed:
+            return
+        for conn in self.conns:
+            conn.send(('close', None))
+            conn.close()
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def _wait(self):
+        for conn in self.conns:
+            conn.recv()
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            try:
+                self.close()
+            except OSError: # 进程已退出
+                pass
+
+
+def _async_worker(conn, ready_queue, slab, layout, num_envs, start, stop, config, is_training, worker_agents):
+    ''' Step the games [start, stop) of an AsyncUnoEnvPool one by one, and put the
+    index of each game on ready_queue once a seat without a worker agent is to act
+    '''
+    arrays, _ = get_slab_arrays(slab, layout, num_envs)
+    seed = config.get('seed')
+    config = dict(config)
+    if seed is not None:
+        config['seed'] = seed + start
+    np.random.seed(None if seed is None else seed + start)
+    venv = VectorUnoEnv(stop - start, config, is_training, {key: array[start:stop] for key, array in arrays.items()})
+    raw_fields = any(agent is not None and agent.use_raw for agent in worker_agents)
+    for env in venv.envs:
+        env.raw_fields = raw_fields
+
+    def play_worker_agents(k):
+        # the seats of the worker agents are played here until another seat is to act —— 规则智能体在进程内直接出牌
+        while worker_agents[venv.player_id[k]] is not None:
+            agent = worker_agents[venv.player_id[k]]
+            state = venv.states[k]
+            action = agent.step(state) if is_training else agent.eval_step(state)[0]
+            venv.step_env(k, action, agent.use_raw)
+        ready_queue.put(start + k)
+
+    try:
+        while True:
+            command, data = conn.recv()
+            if command == 'step':
+                for k, action in zip(*data):
+                    k -= start
+                    venv.reward[k] = 0
+                    venv.done[k] = False
+                    venv.step_env(k, action)
+                    play_worker_agents(k)
+            elif command == 'reset':
+                for k in range(venv.num_envs):
+                    venv.reset_env(k)
+                    play_worker_agents(k)
+            elif command == 'close':
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+class AsyncUnoEnvPool:
+    ''' Keep M UnoEnv games in flight across worker processes and hand out whichever are ready
+
+    recv() returns the first batch_size games whose current player is to act, with
+    their observations, and send(ids, actions) gives them their next actions. The
+    observations are written into a shared slab as in SubprocVectorUnoEnv and
+    only game indices and action ids cross the processes.
+
+    Seats can be given worker agents, such as rule agents: they are played inside
+    the workers, so a game is only returned when one of the other seats is to act.
+    '''
+
+    def __init__(self, num_envs, batch_size, num_workers=None, config={}, is_training=True, worker_agents=None, start_method=None):
+        ''' Start the workers
+
+        Args:
+            num_envs (int): The number of games M
+            batch_size (int): The number of games B returned by recv
+            num_workers (int): The number of worker processes, the number of CPUs by default
+            config (dict): The config of each UnoEnv, game k is seeded with seed + k
+            is_training (boolean): True to reward with the scores, False with the payoffs
+            worker_agents (list): An agent or None per seat, the agents are played in the workers
+            start_method (str): The multiprocessing start method, the default of the platform by default
+        '''
+        env = make('uno', config)
+        if worker_agents is None:
+            worker_agents = [None for _ in range(env.num_players)]
+        if all(agent is not None for agent in worker_agents):
+            raise ValueError('At least one seat must be played through recv and send')
+        self.num_envs = num_envs
+        self.batch_size = min(batch_size, num_envs)
+        self.num_players = env.num_players
+        self.num_actions = env.num_actions
+        self.state_shape = env.state_shape
+        self.z_shape = env.obs_schema.z_shape
+        self.num_workers = min(num_workers or mp.cpu_count(), num_envs)
+        self.is_training = is_training
+
+        layout = get_layout(env)
+        _, size = get_slab_arrays(None, layout, num_envs)
+        ctx = mp.get_context(start_method)
+        self.slab = ctx.RawArray('B', size)
+        arrays, _ = get_slab_arrays(self.slab, layout, num_envs)
+        self.x = arrays['x']
+        self.z = arrays['z']
+        self.legal_mask = arrays['legal_mask']
+        self.player_id = arrays['player_id']
+        self.reward = arrays['reward']
+        self.done = arrays['done']
+
+        self.bounds = [num_envs * w // self.num_workers for w in range(self.num_workers + 1)]
+        self.ready_queue = ctx.SimpleQueue()
+        self.conns = []
+        self.processes = []
+        for w in range(self.num_workers):
+            conn, worker_conn = ctx.Pipe()
+            process = ctx.Process(target=_async_worker,
+                                  args=(worker_conn, self.ready_queue, self.slab, layout, num_envs, self.bounds[w], self.bounds[w + 1],
+                                        config, is_training, worker_agents),
+                                  daemon=True)
+            process.start()
+            worker_conn.close()
+            self.conns.append(conn)
+            self.processes.append(process)
+        self.num_in_flight = 0 # 已发出动作、尚未返回的游戏数
+        self.closed = False
+
+    def reset(self):
+        ''' Start a new game in every slot, the games are returned by recv as they are ready
+        '''
+        for conn in self.conns:
+            conn.send(('reset', None))
+        self.num_in_flight = self.num_envs
+
+    def recv(self):
+        ''' Wait for the first batch_size ready games, fewer if fewer are in flight
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (numpy.array): The indices of the games
+                (numpy.array): x of the games
+                (numpy.array): z of the games
+                (numpy.array): legal_mask of the games
+                (numpy.array): The id of the current player of each game
+                (numpy.array): reward of the games, the payoffs of the games that ended since they were last returned
+                (numpy.array): done of the games, True if a game ended since it was last returned
+        '''
+        num = min(self.batch_size, self.num_in_flight)
+        ids = np.array([self.ready_queue.get() for _ in range(num)], dtype=np.int64)
+        self.num_in_flight -= num
+        return ids, self.x[ids], self.z[ids], self.legal_mask[ids], self.player_id[ids], self.reward[ids], self.done[ids]
+
+    def send(self, ids, actions):
+        ''' Give the next actions to games returned by recv
+
+        Args:
+            ids (numpy.array): The indices of the games
+            actions (numpy.array): The action id of the current player of each game
+        '''
+        ids = np.asarray(ids, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        workers = np.searchsorted(self.bounds, ids, side='right') - 1 # 每个游戏所在的进程
+        for w in np.unique(workers):
+            selected = workers == w
+            self.conns[w].send(('step', (ids[selected], actions[selected])))
+        self.num_in_flight += len(ids)
+
+    def step_agents(self, agents, is_training=None):
+        ''' Receive a batch, let agents with batch_step / batch_eval_step act and send the actions
+
+        Args:
+            agents (list): An agent per seat, the seats of worker agents are never asked
+            is_training (boolean): True to call batch_step, False batch_eval_step,
+              the is_training of the pool by default
+
+        Returns:
+            (tuple): The indices of the games, the actions, reward and done of the received games
+        '''
+        if is_training is None:
+            is_training = self.is_training
+        ids, x, z, legal_mask, player_id, reward, done = self.recv()
+        actions = np.zeros(len(ids), dtype=np.int64)
+        for seat in np.unique(player_id):
+            agent = agents[seat]
+            rows = np.flatnonzero(player_id == seat)
+            batch_step = agent.batch_step if is_training else agent.batch_eval_step
+            actions[rows] = batch_step(x[rows], z[rows], legal_mask[rows])
+        self.send(ids, actions)
+        return ids, actions, reward, done
+
+    def close(self):
+        ''' Stop the workers
+        '''
+        if self.closed:
+            return
+        for conn in self.conns:
+            conn.send(('close', None))
+            conn.close()
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            try:
+                self.close()
+            except OSError:
+                pass
@@ -4,3 +4,5 @@ from rlcard.games.uno.player import UnoPlayer as Player
 from rlcard.games.uno.round import UnoRound as Round
 from rlcard.games.uno.game import UnoGame as Game
 
+from rlcard.games.uno.batched_game import BatchedUnoGame as BatchedGame
+from rlcard.games.uno.zobrist import TranspositionTable
@@ -0,0 +1,272 @@
+import numpy as np
+
+from rlcard.games.uno.dealer import UnoDealer
+from rlcard.games.uno.utils import NUM_CARDS, NUM_CARD_TYPES, NUM_FACES, NUM_ACTIONS
+from rlcard.games.uno.utils import DRAW_ACTION, QUERY_ACTION, PASS_ACTION, PLAYABLE, QUERY_MASK, DRAWN_MASK
+from rlcard.games.uno.utils import SKIP, REVERSE, DRAW_2, WILD_TRAIT, WILD_DRAW_4_TRAIT, WILD_CARD
+from rlcard.games.uno.utils import CARD_TYPE, CARD_FACE, CARD_COLOR, CARD_TRAIT, CARD_KIND
+from rlcard.games.uno.utils import FACE_TYPE, FACE_COLOR, FACE_TRAIT, TYPE_COLOR, TYPE_SCORE
+
+# phases of a decision —— 当前玩家所处的决策阶段
+NORMAL = 0 # 正常出牌或抽牌
+DRAWN = 1 # 抽到可出的牌，只能打出或放弃
+CHALLENGE = 2 # 上家打出 ‘+4’，只能质疑或放弃
+
+# COLOR_TYPES[color] marks the card types of that color
+COLOR_TYPES = TYPE_COLOR[None, :] == np.arange(4)[:, None]
+
+
+class BatchedUnoGame:
+    ''' Play many UNO games in lockstep with the rules of UnoRound.proceed_round
+
+    All games are stored as struct-of-arrays, a hand is a count vector over the
+    54 card types and a deck is an array of card ids dealt from its end.
+    Finished games are reset automatically in step.
+    '''
+
+    def __init__(self, num_games, num_players=2):
+        self.num_games = num_games
+        self.num_players = num_players
+        self.np_random = np.random.RandomState()
+
+        self.hand_counts = np.zeros((num_games, num_players, NUM_CARD_TYPES), dtype=np.int8)
+        self.num_cards = np.zeros((num_games, num_players), dtype=np.int64)
+        self.deck = np.zeros((num_games, NUM_CARDS), dtype=np.int8)
+        self.deck_cursor = np.zeros(num_games, dtype=np.int64) # 牌堆剩余张数，从 deck[cursor - 1] 开始发牌
+        self.target = np.zeros(num_games, dtype=np.int64)
+        self.last_target = np.zeros(num_games, dtype=np.int64)
+        self.drawn_card = np.zeros(num_games, dtype=np.int64)
+        self.direction = np.ones(num_games, dtype=np.int64)
+        self.current_player = np.zeros(num_games, dtype=np.int64)
+        self.phase = np.zeros(num_games, dtype=np.int8)
+        self.is_over = np.zeros(num_games, dtype=bool)
+        self.winner = np.full(num_games, -1, dtype=np.int64)
+        self.winners = np.full(num_games, -1, dtype=np.int64) # 每个位置上一局结束时的赢家，平局为 -1
+
+    def init_game(self):
+        ''' Start a new game in every slot
+
+        Returns:
+            (numpy.array): The id of the current player of each game
+        '''
+        self._reset(np.arange(self.num_games))
+        return self.current_player.copy()
+
+    def step(self, actions):
+        ''' Advance every game by one action
+
+        Args:
+            actions (numpy.array): One legal action id for the current player of each game
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (numpy.array): The id of the next player of each game
+                (numpy.array): True for the games that ended in this step and were reset
+                (numpy.array): Scores of the ended games as in UnoRound.get_scores, 0 elsewhere
+        '''
+        actions = np.asarray(actions)
+        self._play(np.flatnonzero(actions < NUM_FACES), actions[actions < NUM_FACES])
+        self._draw(np.flatnonzero(actions == DRAW_ACTION))
+        self._query(np.flatnonzero(actions == QUERY_ACTION))
+        self._pass(np.flatnonzero(actions == PASS_ACTION))
+
+        done = self.is_over.copy()
+        payoffs = np.zeros((self.num_games, self.num_players), dtype=np.int64)
+        games = np.flatnonzero(done)
+        if len(games):
+            payoffs[games] = self._get_scores(games)
+            self._reset(games)
+        return self.current_player.copy(), done, payoffs
+
+    def get_legal_mask(self):
+        ''' Return the legal actions of the current player of each game
+
+        Returns:
+            (numpy.array): A boolean array of shape (num_games, 63)
+        '''
+        games = np.arange(self.num_games)
+        hand = self.hand_counts[games, self.current_player]
+        legal_mask = np.zeros((self.num_games, NUM_ACTIONS), dtype=bool)
+        legal_mask[:, :NUM_FACES] = (hand[:, FACE_TYPE] > 0) & PLAYABLE[self.target]
+        legal_mask[:, DRAW_ACTION] = True
+
+        drawn = self.phase == DRAWN
+        legal_mask[drawn] = DRAWN_MASK[self.drawn_card[drawn]]
+        legal_mask[self.phase == CHALLENGE] = QUERY_MASK
+        return legal_mask
+
+    def get_num_players(self):
+        ''' Return the number of players in each game
+
+        Returns:
+            (int): The number of players in each game
+        '''
+        return self.num_players
+
+    @staticmethod
+    def get_num_actions():
+        ''' Return the number of applicable actions
+
+        Returns:
+            (int): The number of actions. There are 63 actions
+        '''
+        return NUM_ACTIONS
+
+    def _reset(self, games):
+        ''' Shuffle, deal and flip the top card for the given games
+        '''
+        num = len(games)
+        self.deck[games] = UnoDealer.shuffled_decks(self.np_random, num)
+        self.deck_cursor[games] = NUM_CARDS
+        self.hand_counts[games] = 0
+        self.num_cards[games] = 0
+        for player_id in range(self.num_players): # 给每个玩家发 7 张牌
+            self._deal(games, np.full(num, player_id), 7)
+        self.direction[games] = 1
+        self.current_player[games] = self.np_random.randint(0, self.num_players, size=num)
+        self.phase[games] = NORMAL
+        self.is_over[games] = False
+        self.winner[games] = -1
+
+        # a 'wild_draw_4' on top is swapped with a random card below it —— 首牌不能是 ‘+4’
+        top = self.deck_cursor[games] - 1
+        while True:
+            redo = CARD_TRAIT[self.deck[games, top]] == WILD_DRAW_4_TRAIT
+            if not redo.any():
+                break
+            redo_games, redo_top = games[redo], top[redo]
+            below = self.np_random.randint(0, redo_top)
+            top_cards = self.deck[redo_games, redo_top]
+            self.deck[redo_games, redo_top] = self.deck[redo_games, below]
+            self.deck[redo_games, below] = top_cards
+        cards = self.deck[games, top]
+        self.deck_cursor[games] = top
+
+        # perform the top card —— 执行首牌
+        faces = CARD_FACE[cards].astype(np.int64)
+        traits = CARD_TRAIT[cards]
+        wild = traits == WILD_TRAIT
+        faces[wild] = self.np_random.randint(0, 4, size=int(wild.sum())) * 15 + WILD_TRAIT
+        self.target[games] = faces
+
+        current = self.current_player[games]
+        reverse = traits == REVERSE
+        self.direction[games[reverse]] = -1
+        draw_2 = traits == DRAW_2
+        self._deal(games[draw_2], current[draw_2], 2)
+        moved = (traits == SKIP) | reverse | draw_2
+        self.current_player[games[moved]] = (current + self.direction[games])[moved] % self.num_players
+
+    def _deal(self, games, players, num):
+        ''' Deal the top num cards of each game's deck to one player of that game
+        '''
+        if not len(games):
+            return
+        positions = self.deck_cursor[games][:, None] - 1 - np.arange(num)
+        cards = self.deck[games[:, None], positions]
+        self.deck_cursor[games] -= num
+        np.add.at(self.hand_counts, (np.repeat(games, num), np.repeat(players, num), CARD_TYPE[cards.ravel()]), 1)
+        self.num_cards[games, players] += num
+
+    def _play(self, games, faces):
+        if not len(games):
+            return
+        current = self.current_player[games]
+        self.hand_counts[games, current, FACE_TYPE[faces]] -= 1
+        self.num_cards[games, current] -= 1
+        won = self.num_cards[games, current] == 0 # 当前玩家手牌为空，游戏结束
+        self.is_over[games[won]] = True
+        self.winner[games[won]] = current[won]
+
+        traits = FACE_TRAIT[faces]
+        direction = np.where(traits == REVERSE, -self.direction[games], self.direction[games])
+        self.direction[games] = direction
+
+        # ‘+2’ needs two cards in the deck, otherwise the game ends
+        draw_2 = traits == DRAW_2
+        short = draw_2 & (self.deck_cursor[games] < 2)
+        self.is_over[games[short]] = True
+        dealt = draw_2 & ~short
+        self._deal(games[dealt], (current + direction)[dealt] % self.num_players, 2)
+
+        wild_draw_4 = traits == WILD_DRAW_4_TRAIT
+        self.last_target[games[wild_draw_4]] = self.target[games[wild_draw_4]]
+
+        # skip and draw_2 jump over the next player
+        steps = np.where((traits == SKIP) | draw_2, 2, 1)
+        moved = ~short
+        self.current_player[games[moved]] = (current + steps * direction)[moved] % self.num_players
+        self.target[games[moved]] = faces[moved]
+        self.phase[games] = np.where(wild_draw_4, CHALLENGE, NORMAL)
+
+    def _draw(self, games):
+        if not len(games):
+            return
+        empty = self.deck_cursor[games] == 0 # 牌盒内没有牌，游戏结束
+        self.is_over[games[empty]] = True
+        games = games[~empty]
+        current = self.current_player[games]
+        cards = self.deck[games, self.deck_cursor[games] - 1]
+        self.deck_cursor[games] -= 1
+        self.hand_counts[games, current, CARD_TYPE[cards]] += 1
+        self.num_cards[games, current] += 1
+
+        targets = self.target[games]
+        playable = ((CARD_COLOR[cards] == FACE_COLOR[targets])
+                    | (CARD_TRAIT[cards] == FACE_TRAIT[targets])
+                    | (CARD_KIND[cards] == WILD_CARD))
+        self.drawn_card[games] = cards
+        self.phase[games] = np.where(playable, DRAWN, NORMAL)
+        # 抽到不能出的牌，轮到下一玩家
+        skipped = ~playable
+        self.current_player[games[skipped]] = (current + self.direction[games])[skipped] % self.num_players
+
+    def _pass(self, games):
+        if not len(games):
+            return
+        current = self.current_player[games]
+        wild_draw_4 = FACE_TRAIT[self.target[games]] == WILD_DRAW_4_TRAIT
+        short = wild_draw_4 & (self.deck_cursor[games] < 4)
+        self.is_over[games[short]] = True
+        penalised = wild_draw_4 & ~short
+        self._deal(games[penalised], current[penalised], 4)
+        moved = ~short
+        self.current_player[games[moved]] = (current + self.direction[games])[moved] % self.num_players
+        self.phase[games] = NORMAL
+
+    def _query(self, games):
+        if not len(games):
+            return
+        current = self.current_player[games]
+        direction = self.direction[games]
+        last = (current - direction) % self.num_players
+        colors = FACE_COLOR[self.last_target[games]]
+        # 质疑成功：打出 ‘+4’ 的玩家手上有同色牌
+        success = ((self.hand_counts[games, last] > 0) & COLOR_TYPES[colors]).any(axis=1)
+        short = self.deck_cursor[games] < np.where(success, 4, 6)
+        self.is_over[games[short]] = True
+
+        caught = success & ~short
+        self._deal(games[caught], last[caught], 4)
+        failed = ~success & ~short
+        self._deal(games[failed], current[failed], 6)
+        self.current_player[games[failed]] = (current + direction)[failed] % self.num_players
+        self.phase[games] = NORMAL
+
+    def _get_scores(self, games):
+        ''' Scores of finished games, the same as UnoRound.get_scores
+        '''
+        scores = -(self.hand_counts[games].astype(np.int64) @ TYPE_SCORE)
+        winner = self.winner[games]
+        if self.num_players == 2:
+            undecided = winner < 0
+            judged = np.where(scores[:, 0] > scores[:, 1], 0, np.where(scores[:, 0] < scores[:, 1], 1, -1))
+            winner = np.where(undecided, judged, winner)
+        self.winners[games] = winner
+
+        payoffs = scores.copy()
+        decided = winner >= 0
+        payoffs[np.flatnonzero(decided), winner[decided]] -= scores[decided].sum(axis=1)
+        payoffs[~decided] = 0
+        return payoffs
@@ -1,39 +1,131 @@
+import numpy as np
 
-from rlcard.games.uno.utils import init_deck
+from rlcard.games.uno.utils import init_deck, NUM_CARDS, CARD_TRAIT, CARD_TYPE, WILD_DRAW_4_TRAIT
+from rlcard.games.uno.zobrist import MASK, DECK_KEYS, hash_deck
 
 
 class UnoDealer:
     ''' Initialize a uno dealer class
+
+    The deck is an array of card ids that is dealt from its end, cards
+    deck[:cursor] are still in the deck and deck[cursor - 1] is the top card.
     '''
-    def __init__(self, np_random):
+    def __init__(self, np_random, deck=None, cursor=NUM_CARDS):
+        ''' Initialize the dealer
+
+        Args:
+            np_random (object): The random state
+            deck (numpy.array): A shuffled deck from shuffled_decks, a new deck is shuffled by default
+            cursor (int): The number of cards left in the given deck
+        '''
         self.np_random = np_random
-        self.deck = init_deck()
-        self.shuffle()
+        self.cursor = cursor
+        if deck is None:
+            self.deck = np.array(init_deck(), dtype=np.int8)
+            self.shuffle()
+        else:
+            self.deck = deck
+            self.deck_hash = hash_deck(self.deck, self.cursor) # 牌堆顺序的 Zobrist 哈希
+        self.dealt = [] # 每张发出的牌对应的玩家 id，用于撤销
+
+    @staticmethod
+    def shuffled_decks(np_random, num):
+        ''' Shuffle many decks at once
+
+        Args:
+            np_random (object): The random state
+            num (int): The number of decks
+
+        Returns:
+            (numpy.array): A num * 108 array, each row is a shuffled deck
+        '''
+        return np.argsort(np_random.rand(num, NUM_CARDS), axis=1).astype(np.int8)
+
+    def clone(self, np_random):
+        ''' Copy the deck into a new dealer that starts with an empty deal log
+
+        Args:
+            np_random (object): The random state of the new dealer
+
+        Returns:
+            (object): The object of UnoDealer
+        '''
+        dealer = UnoDealer.__new__(UnoDealer)
+        dealer.np_random = np_random
+        dealer.deck = self.deck.copy()
+        dealer.cursor = self.cursor
+        dealer.deck_hash = self.deck_hash
+        dealer.dealt = []
+        return dealer
 
     def shuffle(self):
-        ''' Shuffle the deck
+        ''' Shuffle the cards left in the deck
+        '''
+        self.np_random.shuffle(self.deck[:self.cursor])
+        self.deck_hash = hash_deck(self.deck, self.cursor)
+
+    def get_deck(self):
+        ''' Return the cards left in the deck
+
+        Returns:
+            (list): The card ids from the bottom to the top of the deck
+        '''
+        return self.deck[:self.cursor].tolist()
+
+    def refill(self, cards):
+        ''' Put cards back under the deck and shuffle it
+
+        Args:
+            cards (list): The card ids to be put back
         '''
-        self.np_random.shuffle(self.deck)
+        left = self.deck[:self.cursor]
+        self.deck = np.concatenate((np.array(cards, dtype=np.int8), left))
+        self.cursor = len(self.deck)
+        self.shuffle()
 
     def deal_cards(self, player, num):
         ''' Deal some cards from deck to one player
 
         Args:
-            player (object): The object of DoudizhuPlayer
+            player (object): The object of UnoPlayer
             num (int): The number of cards to be dealed
         '''
+        cards = self.deck[self.cursor - num:self.cursor][::-1].tolist() # 从牌堆顶部依次发牌
+        deck_hash = self.deck_hash
+        for card in cards:
+            self.cursor -= 1
+            deck_hash -= DECK_KEYS[self.cursor][card]
+            player.add_card(card)
+            player.unseen_counts[CARD_TYPE[card]] -= 1
+        self.deck_hash = deck_hash & MASK
+        self.dealt.extend([player.player_id] * num)
+
+    def undeal_cards(self, players, num):
+        ''' Put the last dealt cards back on top of the deck
+
+        Args:
+            players (list): The list of UnoPlayer
+            num (int): The number of cards to be returned
+        '''
         for _ in range(num):
-            player.hand.append(self.deck.pop())
+            player = players[self.dealt.pop()]
+            card = player.remove_card(len(player.hand) - 1)
+            player.unseen_counts[CARD_TYPE[card]] += 1
+            self.deck[self.cursor] = card
+            self.deck_hash = (self.deck_hash + DECK_KEYS[self.cursor][card]) & MASK
+            self.cursor += 1
 
     def flip_top_card(self):
         ''' Flip top card when a new game starts
 
         Returns:
-            (object): The object of UnoCard at the top of the deck
+            (int): The card id at the top of the deck
         '''
-        top_card = self.deck.pop()
-        while top_card.trait == 'wild_draw_4': # 第一张牌如果是 +4 牌，则重新洗牌
-            self.deck.append(top_card)
-            self.shuffle()
-            top_card = self.deck.pop()
-        return top_card
+        top = self.cursor - 1
+        while CARD_TRAIT[self.deck[top]] == WILD_DRAW_4_TRAIT: # 第一张牌如果是 +4 牌，则与下面随机一张牌交换
+            below = self.np_random.randint(0, top)
+            self.deck[[top, below]] = self.deck[[below, top]]
+        card = int(self.deck[top])
+        self.cursor = top
+        self.deck_hash = hash_deck(self.deck, self.cursor)
+        return card
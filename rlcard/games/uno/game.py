@@ -1,9 +1,39 @@
-from copy import deepcopy
 import numpy as np
 
 from rlcard.games.uno import Dealer
 from rlcard.games.uno import Player
 from rlcard.games.uno import Round
+from rlcard.games.uno.zobrist import hash_hand, hash_played
+from rlcard.games.uno.utils import ACTION_SPACE, ACTION_LIST, NUM_CARDS, NUM_CARD_TYPES, CARD_TYPE, CARD_SCORE, FACE_TYPE, TYPE_COUNT
+
+# fixed layout of UnoGame.to_bytes, fields that can be None are stored as -1
+STATE_VERSION = 1
+MAX_PLAYERS = 4
+STATE_LAYOUT = np.dtype([
+    ('version', 'u1'),
+    ('num_players', 'u1'),
+    ('allow_step_back', 'u1'),
+    ('num_shuffled_decks', '<u2'),
+    ('cursor', 'u1'), # 牌堆剩余张数
+    ('hand_sizes', 'u1', (MAX_PLAYERS,)),
+    ('cards', 'i1', (NUM_CARDS,)), # 牌堆（从底到顶）、各玩家手牌的牌 id，之后是已出牌的 face id
+    ('target', 'i1'),
+    ('last_target', 'i1'),
+    ('direction', 'i1'),
+    ('current_player', 'i1'),
+    ('action', 'i1'),
+    ('draw_player', 'i1'),
+    ('draw_card', 'i1'),
+    ('is_over', 'u1'),
+    ('winner', 'i1'),
+])
+# optional random state appended to the layout above
+RNG_LAYOUT = np.dtype([
+    ('keys', '<u4', (624,)),
+    ('pos', '<i4'),
+    ('has_gauss', '<i4'),
+    ('cached_gaussian', '<f8'),
+])
 
 
 class UnoGame:
@@ -13,11 +43,21 @@ class UnoGame:
         self.np_random = np.random.RandomState()
         self.num_players = num_players
         self.payoffs = [0 for _ in range(self.num_players)]
+        # > 0 to shuffle that many decks at once and use one per game
+        self.num_shuffled_decks = 0
+        self.shuffled_decks = []
+        # counts the changes of the position, the legal mask of the current player
+        # is cached until it changes —— 局面每变化一次计数加一，合法动作掩码按计数缓存
+        self.step_counter = 0
+        self._legal_step = -1
+        self._legal_mask = None
         
     def configure(self, game_config):
         ''' Specifiy some game specific parameters, such as number of players
         '''
         self.num_players = game_config['game_num_players']
+        self.num_shuffled_decks = game_config['game_num_shuffled_decks']
+        self.shuffled_decks = []
 
     def init_game(self):
         ''' Initialize players and state
@@ -32,7 +72,12 @@ class UnoGame:
         self.payoffs = [0 for _ in range(self.num_players)]
 
         # Initialize a dealer that can deal cards —— 初始化一副 uno 手牌
-        self.dealer = Dealer(self.np_random)
+        if self.num_shuffled_decks > 0:
+            if not len(self.shuffled_decks):
+                self.shuffled_decks = list(Dealer.shuffled_decks(self.np_random, self.num_shuffled_decks))
+            self.dealer = Dealer(self.np_random, self.shuffled_decks.pop())
+        else:
+            self.dealer = Dealer(self.np_random)
 
         # Initialize four players to play the game
         self.players = [Player(i, self.np_random) for i in range(self.num_players)]
@@ -50,6 +95,7 @@ class UnoGame:
 
         # Save the hisory for stepping back to the last state.
         self.history = []
+        self.step_counter += 1
 
         player_id = self.round.current_player # 获取当前玩家 id
         state = self.get_state(player_id) # 获取当前玩家 state
@@ -61,6 +107,20 @@ class UnoGame:
         Args:
             action (str): A specific action
 
+        Returns:
+            (tuple): Tuple containing:
+
+                (dict): next player's state
+                (int): next plater's id
+        '''
+        return self.step_id(ACTION_SPACE[action])
+
+    def step_id(self, action_id):
+        ''' Get the next state after an action given by its id
+
+        Args:
+            action_id (int): The id of a legal action
+
         Returns:
             (tuple): Tuple containing:
 
@@ -69,13 +129,11 @@ class UnoGame:
         '''
 
         if self.allow_step_back:
-            # First snapshot the current state
-            his_dealer = deepcopy(self.dealer)
-            his_round = deepcopy(self.round)
-            his_players = deepcopy(self.players)
-            self.history.append((his_dealer, his_players, his_round))
+            # First record what is needed to undo this step
+            self.history.append(self.round.get_snapshot())
 
-        self.round.proceed_round(self.players, action) # 当前局面 players 进行 action 操作后，局面变化
+        self.round.proceed_action(self.players, action_id) # 当前局面 players 进行 action 操作后，局面变化
+        self.step_counter += 1
         player_id = self.round.current_player
         state = self.get_state(player_id) # 进行 action 后获取当前玩家的 state
         return state, player_id
@@ -88,9 +146,173 @@ class UnoGame:
         '''
         if not self.history:
             return False
-        self.dealer, self.players, self.round = self.history.pop()
+        self.round.restore_snapshot(self.players, self.history.pop())
+        self.step_counter += 1
         return True
 
+    def clone(self, copy_rng=False):
+        ''' Copy the current game so that it can be played independently
+
+        Only the compact state is copied: the deck, the hands and the fields of
+        the round. The card tables are module level and shared by all games. The
+        clone cannot step back beyond the point it was cloned at.
+
+        Args:
+            copy_rng (boolean): True to give the clone its own copy of the random
+              state. By default it is shared, which is much cheaper and only
+              matters when either game calls init_game, since steps draw no
+              random numbers
+
+        Returns:
+            (object): The object of UnoGame
+        '''
+        game = UnoGame.__new__(UnoGame)
+        game.allow_step_back = self.allow_step_back
+        game.num_players = self.num_players
+        game.payoffs = list(self.payoffs)
+        game.num_shuffled_decks = self.num_shuffled_decks
+        game.shuffled_decks = []
+        if copy_rng:
+            game.np_random = np.random.RandomState()
+            game.np_random.set_state(self.np_random.get_state())
+        else:
+            game.np_random = self.np_random
+        game.dealer = self.dealer.clone(game.np_random)
+        game.players = [player.clone(game.np_random) for player in self.players]
+        game.round = self.round.clone(game.dealer, game.np_random)
+        game.history = []
+        game.step_counter = self.step_counter
+        game._legal_step = self._legal_step
+        game._legal_mask = self._legal_mask # 掩码只读，可以共享
+        return game
+
+    def to_bytes(self, with_rng=False):
+        ''' Serialize the current position into a fixed layout buffer, see STATE_LAYOUT
+
+        Only the position is stored: the history for step back, the pool of
+        shuffled decks and the payoffs of the last get_payoffs call are not.
+
+        Args:
+            with_rng (boolean): True to append the random state. It takes about
+              2.5 KB and only matters for the games started after this one
+
+        Returns:
+            (bytes): The buffer, STATE_LAYOUT.itemsize bytes without the random state
+        '''
+        round = self.round
+        buffer = np.zeros((), dtype=STATE_LAYOUT)
+        buffer['version'] = STATE_VERSION
+        buffer['num_players'] = self.num_players
+        buffer['allow_step_back'] = self.allow_step_back
+        buffer['num_shuffled_decks'] = self.num_shuffled_decks
+        buffer['cursor'] = self.dealer.cursor
+        buffer['hand_sizes'][:self.num_players] = [len(player.hand) for player in self.players]
+        buffer['cards'] = np.concatenate([self.dealer.deck[:self.dealer.cursor]]
+                                         + [player.hand for player in self.players]
+                                         + [round.played_cards])
+        buffer['target'] = round.target
+        buffer['last_target'] = _encode_optional(round.last_target)
+        buffer['direction'] = round.direction
+        buffer['current_player'] = round.current_player
+        buffer['action'] = _encode_optional(round.action)
+        buffer['draw_player'] = _encode_optional(round.draw_player)
+        buffer['draw_card'] = _encode_optional(round.draw_card)
+        buffer['is_over'] = round.is_over
+        buffer['winner'] = -1 if round.winner is None else round.winner[0]
+        data = buffer.tobytes()
+
+        if with_rng:
+            _, keys, pos, has_gauss, cached_gaussian = self.np_random.get_state()
+            rng_buffer = np.zeros((), dtype=RNG_LAYOUT)
+            rng_buffer['keys'] = keys
+            rng_buffer['pos'] = pos
+            rng_buffer['has_gauss'] = has_gauss
+            rng_buffer['cached_gaussian'] = cached_gaussian
+            data += rng_buffer.tobytes()
+        return data
+
+    @classmethod
+    def from_bytes(cls, data, np_random=None):
+        ''' Rebuild a game from the buffer of to_bytes
+
+        The counts of each hand, the unseen cards and the hand scores are
+        derived from the cards. The game cannot step back beyond this point.
+
+        Args:
+            data (bytes): A buffer from to_bytes
+            np_random (object): The random state of the game, used when the
+              buffer holds no random state. A new one is created by default
+
+        Returns:
+            (object): The object of UnoGame
+        '''
+        buffer = np.frombuffer(data, dtype=STATE_LAYOUT, count=1)[0]
+        if buffer['version'] != STATE_VERSION:
+            raise ValueError('Unsupported UNO state version {}'.format(buffer['version']))
+
+        game = cls.__new__(cls)
+        game.allow_step_back = bool(buffer['allow_step_back'])
+        game.num_players = int(buffer['num_players'])
+        game.payoffs = [0 for _ in range(game.num_players)]
+        game.num_shuffled_decks = int(buffer['num_shuffled_decks'])
+        game.shuffled_decks = []
+        game.history = []
+        game.step_counter = 0
+        game._legal_step = -1
+        game._legal_mask = None
+        if len(data) > STATE_LAYOUT.itemsize:
+            rng_buffer = np.frombuffer(data, dtype=RNG_LAYOUT, count=1, offset=STATE_LAYOUT.itemsize)[0]
+            game.np_random = np.random.RandomState()
+            game.np_random.set_state(('MT19937', rng_buffer['keys'], int(rng_buffer['pos']),
+                                      int(rng_buffer['has_gauss']), float(rng_buffer['cached_gaussian'])))
+        else:
+            game.np_random = np.random.RandomState() if np_random is None else np_random
+
+        cards = buffer['cards']
+        cursor = int(buffer['cursor'])
+        deck = np.zeros(NUM_CARDS, dtype=np.int8)
+        deck[:cursor] = cards[:cursor]
+        game.dealer = Dealer(game.np_random, deck, cursor)
+
+        # every played card is public, the rest of the unseen cards are in the deck and the other hands
+        start = cursor
+        hands = []
+        for size in buffer['hand_sizes'][:game.num_players]:
+            hands.append(cards[start:start + size].tolist())
+            start += size
+        played_cards = cards[start:].tolist()
+        unseen_counts = TYPE_COUNT - np.bincount(FACE_TYPE[played_cards], minlength=NUM_CARD_TYPES).astype(np.int8)
+        game.players = []
+        for player_id, hand in enumerate(hands):
+            player = Player(player_id, game.np_random)
+            player.hand = hand
+            player.hand_counts = np.bincount(CARD_TYPE[hand], minlength=NUM_CARD_TYPES).astype(np.int8)
+            player.unseen_counts = unseen_counts - player.hand_counts
+            player.hand_score = sum(CARD_SCORE[card] for card in hand)
+            player.hand_hash = hash_hand(player_id, hand)
+            game.players.append(player)
+
+        # the round is not built with __init__, which draws the first player
+        round = Round.__new__(Round)
+        round.np_random = game.np_random
+        round.dealer = game.dealer
+        round.num_players = game.num_players
+        round.target = int(buffer['target'])
+        round.last_target = _decode_optional(buffer['last_target'])
+        round.direction = int(buffer['direction'])
+        round.current_player = int(buffer['current_player'])
+        round.action = _decode_optional(buffer['action'])
+        round.draw_player = _decode_optional(buffer['draw_player'])
+        round.draw_card = _decode_optional(buffer['draw_card'])
+        round.is_over = bool(buffer['is_over'])
+        round.winner = None if buffer['winner'] < 0 else [int(buffer['winner'])]
+        round.played_cards = played_cards
+        round.played_hash = hash_played(played_cards)
+        round.removed = []
+        round.payoffs = [0 for _ in range(game.num_players)]
+        game.round = round
+        return game
+
     def get_state(self, player_id):
         ''' Return player's state
 
@@ -100,11 +322,31 @@ class UnoGame:
         Returns:
             (dict): The state of the player
         '''
-        state = self.round.get_state(self.players, player_id)
+        legal_mask = self.get_legal_mask() if player_id == self.round.current_player else None
+        state = self.round.get_state(self.players, player_id, legal_mask)
         state['num_players'] = self.get_num_players()
         state['current_player'] = self.round.current_player
         return state
 
+    def get_state_hash(self):
+        ''' Return the Zobrist hash of the full state, see UnoRound.get_state_hash
+
+        Returns:
+            (int): A 64-bit hash
+        '''
+        return self.round.get_state_hash(self.players)
+
+    def get_info_hash(self, player_id):
+        ''' Return the Zobrist hash of what a player can observe, see UnoRound.get_info_hash
+
+        Args:
+            player_id (int): player id
+
+        Returns:
+            (int): A 64-bit hash
+        '''
+        return self.round.get_info_hash(self.players, player_id)
+
     def get_payoff_train(self):
         ''' Return the payoffs of the game
 
@@ -139,7 +381,19 @@ class UnoGame:
             (list): A list of legal actions
         '''
 
-        return self.round.get_legal_actions(self.players, self.round.current_player)
+        return [ACTION_LIST[action_id] for action_id in np.flatnonzero(self.get_legal_mask())]
+
+    def get_legal_mask(self):
+        ''' Return the legal actions for current player as a mask, computed once
+        per position and shared by the state, the encoder and the decoder
+
+        Returns:
+            (numpy.array): A boolean array over the action ids, it must not be modified
+        '''
+        if self._legal_step != self.step_counter:
+            self._legal_mask = self.round.get_legal_mask(self.players, self.round.current_player)
+            self._legal_step = self.step_counter
+        return self._legal_mask
 
     def get_num_players(self):
         ''' Return the number of players in Limit Texas Hold'em
@@ -173,3 +427,10 @@ class UnoGame:
             (boolean): True if the game is over
         '''
         return self.round.is_over
+
+
+def _encode_optional(value):
+    return -1 if value is None else value
+
+def _decode_optional(value):
+    return None if value < 0 else int(value)
@@ -1,3 +1,8 @@
+import numpy as np
+
+from rlcard.games.uno.utils import NUM_CARD_TYPES, CARD_TYPE, CARD_SCORE, TYPE_COUNT
+from rlcard.games.uno.zobrist import MASK, HAND_KEYS
+
 
 class UnoPlayer:
 
@@ -10,8 +15,60 @@ class UnoPlayer:
         self.np_random = np_random
         self.player_id = player_id
         self.hand = []
+        self.hand_counts = np.zeros(NUM_CARD_TYPES, dtype=np.int8) # 手牌中每种牌的张数
+        self.unseen_counts = TYPE_COUNT.copy() # 该玩家未见过的每种牌的张数（牌堆和对手手牌）
+        self.hand_score = 0 # 手牌总分，随加牌和出牌更新
+        self.hand_hash = 0 # 手牌的 Zobrist 哈希
         self.stack = []
 
+    def add_card(self, card, index=None):
+        ''' Put a card into the hand
+
+        Args:
+            card (int): The card id
+            index (int): The position to insert the card at, the end of hand by default
+        '''
+        if index is None:
+            self.hand.append(card)
+        else:
+            self.hand.insert(index, card)
+        self.hand_counts[CARD_TYPE[card]] += 1
+        self.hand_score += CARD_SCORE[card]
+        self.hand_hash = (self.hand_hash + HAND_KEYS[self.player_id][card]) & MASK
+
+    def remove_card(self, index):
+        ''' Take a card out of the hand
+
+        Args:
+            index (int): The position of the card in hand
+
+        Returns:
+            (int): The card id
+        '''
+        card = self.hand.pop(index)
+        self.hand_counts[CARD_TYPE[card]] -= 1
+        self.hand_score -= CARD_SCORE[card]
+        self.hand_hash = (self.hand_hash - HAND_KEYS[self.player_id][card]) & MASK
+        return card
+
+    def clone(self, np_random):
+        ''' Copy the hand into a new player
+
+        Args:
+            np_random (object): The random state of the new player
+
+        Returns:
+            (object): The object of UnoPlayer
+        '''
+        player = UnoPlayer.__new__(UnoPlayer)
+        player.__dict__.update(self.__dict__)
+        player.np_random = np_random
+        player.hand = list(self.hand)
+        player.hand_counts = self.hand_counts.copy()
+        player.unseen_counts = self.unseen_counts.copy()
+        player.stack = list(self.stack)
+        return player
+
     def get_player_id(self):
         ''' Return the id of the player
         '''
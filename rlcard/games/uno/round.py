@@ -2,7 +2,17 @@ import numpy as np
 
 from rlcard.games.uno.card import UnoCard
 from rlcard.games.uno.judger import UnoJudger
-from rlcard.games.uno.utils import WILD, WILD_DRAW_4, cards2list
+from rlcard.games.uno.state import UnoState
+from rlcard.games.uno.utils import ACTION_LIST, ACTION_SPACE, COLOR_MAP
+from rlcard.games.uno.utils import WILD_CARD, SKIP, REVERSE, DRAW_2, WILD_TRAIT
+from rlcard.games.uno.utils import ACTION_TYPE, ACTION_EFFECT, EFFECT_NUMBER, EFFECT_SKIP, EFFECT_REVERSE
+from rlcard.games.uno.utils import EFFECT_DRAW_2, EFFECT_WILD_DRAW_4, EFFECT_DRAW, EFFECT_QUERY, EFFECT_PASS
+from rlcard.games.uno.utils import CARD_COLOR, CARD_TRAIT, CARD_KIND, CARD_FACE, CARD_TYPE, TYPE_SCORE
+from rlcard.games.uno.utils import FACE_COLOR, FACE_TRAIT, FACE_TYPE, NUM_FACES
+from rlcard.games.uno.utils import NUM_CARDS, NUM_ACTIONS, DRAW_ACTION, PLAYABLE, QUERY_MASK, DRAWN_MASK
+from rlcard.games.uno.zobrist import MASK, PLAYED_KEYS, TARGET_KEYS, LAST_TARGET_KEYS, CURRENT_PLAYER_KEYS
+from rlcard.games.uno.zobrist import REVERSED_KEY, CHALLENGE_KEY, DRAWN_KEY, DRAWN_KEYS, OVER_KEY
+from rlcard.games.uno.zobrist import DECK_SIZE_KEYS, HAND_SIZE_KEYS, VIEWER_KEYS
 
 
 class UnoRound:
@@ -16,11 +26,13 @@ class UnoRound:
         '''
         self.np_random = np_random
         self.dealer = dealer
-        self.target = None
+        self.target = None # face id of the card to follow
         self.current_player = np.random.randint(0, num_players)
         self.num_players = num_players
         self.direction = 1
         self.played_cards = []
+        self.played_hash = 0 # 已出牌堆的 Zobrist 哈希
+        self.removed = [] # (player_id, index, card) of each card played from a hand, used by step back
         self.is_over = False
         self.winner = None
         self.payoffs = [0 for _ in range(self.num_players)]
@@ -33,15 +45,16 @@ class UnoRound:
         ''' Flip the top card of the card pile
 
         Returns:
-            (object of UnoCard): the top card in game
+            (int): the card id of the top card in game
 
         '''
         top = self.dealer.flip_top_card()
-        if top.trait == 'wild': # 如果首张是换色牌，则随机选一个颜色
-            top.color = self.np_random.choice(UnoCard.info['color'])
-            top.str = top.color + top.str[1:]
-        self.target = top
-        self.played_cards.append(top)
+        face = int(CARD_FACE[top])
+        if CARD_TRAIT[top] == WILD_TRAIT: # 如果首张是换色牌，则随机选一个颜色
+            color = COLOR_MAP[self.np_random.choice(UnoCard.info['color'])]
+            face = color * 15 + WILD_TRAIT
+        self.target = face
+        self._add_played(face)
         return top
 
     def perform_top_card(self, players, top_card):
@@ -49,14 +62,16 @@ class UnoRound:
 
         Args:
             players (list): list of UnoPlayer objects
-            top_card (object): object of UnoCard
+            top_card (int): card id of the top card
         '''
-        if top_card.trait == 'skip': # 首牌为 ‘跳过’
+        self._reveal(players, top_card, None) # 首牌所有玩家可见
+        trait = CARD_TRAIT[top_card]
+        if trait == SKIP: # 首牌为 ‘跳过’
             self.current_player = (self.current_player + self.direction) % self.num_players
-        if top_card.trait == 'reverse': # 首牌为 ‘反转’
+        if trait == REVERSE: # 首牌为 ‘反转’
             self.direction = -1
             self.current_player = (self.current_player + self.direction) % self.num_players
-        elif top_card.trait == 'draw_2': # 首牌为 ‘+2’
+        elif trait == DRAW_2: # 首牌为 ‘+2’
             player = players[self.current_player]
             self.dealer.deal_cards(player, 2)
             self.current_player = (self.current_player + self.direction) % self.num_players
@@ -68,124 +83,227 @@ class UnoRound:
             player (object): object of UnoPlayer
             action (str): string of legal action
         '''
-        self.action = action
+        self.proceed_action(players, ACTION_SPACE[action])
 
-        if action == 'draw': # 当前 action 为 ‘抽牌’
+    def proceed_action(self, players, action_id):
+        ''' Apply one action given by its id, the same as proceed_round without string lookups
+
+        Args:
+            players (list): The list of UnoPlayer
+            action_id (int): The id of a legal action
+        '''
+        self.action = action_id
+        effect = ACTION_EFFECT[action_id]
+
+        if effect == EFFECT_DRAW: # 当前 action 为 ‘抽牌’
             self.draw_player = self.current_player
             self._perform_draw_action(players)
             return None
-        elif action == 'pass':
+        elif effect == EFFECT_PASS:
             self._perform_pass_action(players)
             return None
-        elif action == 'query':
+        elif effect == EFFECT_QUERY:
             self._perform_query_action(players)
             return None
 
         player = players[self.current_player]
-        card_info = action.split('-')
-        color = card_info[0]
-        trait = card_info[1]
-        # remove correspongding card —— 移除对应牌值
-        remove_index = None
-        if trait == 'wild' or trait == 'wild_draw_4': # 记录移除的万能牌
-            for index, card in enumerate(player.hand):
-                if trait == card.trait:
-                    remove_index = index
-                    break
-        else:
-            for index, card in enumerate(player.hand): # 记录移除的数字牌或功能牌
-                if color == card.color and trait == card.trait:
-                    remove_index = index
-                    break
-        card = player.hand.pop(remove_index) # 移除当前 action 对应手牌
+        # remove the first card of the played type —— 移除对应牌型的第一张手牌
+        remove_index = int((CARD_TYPE[player.hand] == ACTION_TYPE[action_id]).argmax())
+        card = player.remove_card(remove_index) # 移除当前 action 对应手牌
+        self.removed.append((self.current_player, remove_index, card))
+        self._reveal(players, card, self.current_player)
         if not player.hand: # 当前玩家手牌为空，游戏结束
             self.is_over = True
             self.winner = [self.current_player]
-        self.played_cards.append(card)
+        self._add_played(int(CARD_FACE[card]))
 
         # perform the number action —— 执行当前 action（数字牌）
-        if card.type == 'number':
+        if effect == EFFECT_NUMBER:
             self.current_player = (self.current_player + self.direction) % self.num_players
-            self.target = card
+            self.target = action_id
 
-        # perform the wild action —— 执行当前 action（万能牌）
-        elif card.type == 'wild':
-            card = UnoCard('wild', color, trait)
-            self._preform_non_number_action(players, card)
-        # perform other actions —— 执行当前 action（功能牌）
+        # perform other actions, wild cards take the color of the action —— 执行当前 action（功能牌和万能牌）
         else:
-            self._preform_non_number_action(players, card)
+            self._preform_non_number_action(players, action_id)
+
+    def get_legal_mask(self, players, player_id):
+        ''' Get the legal actions of a player as a mask over the action space
+
+        Args:
+            players (list): The list of UnoPlayer
+            player_id (int): The id of the player
+
+        Returns:
+            (numpy.array): A boolean array of 63 entries, True for legal action ids
+        '''
+        if self.action is not None and ACTION_EFFECT[self.action] == EFFECT_WILD_DRAW_4: # 上家打出 ‘+4’，只能质疑或放弃
+            return QUERY_MASK.copy()
+        if self.action == DRAW_ACTION and self.draw_player == self.current_player: # 抽到可出的牌，只能打出或放弃
+            return DRAWN_MASK[self.draw_card].copy()
+
+        # 手牌中拥有的牌型与当前牌面可出牌型按位与
+        legal_mask = np.zeros(NUM_ACTIONS, dtype=bool)
+        np.logical_and(players[player_id].hand_counts[FACE_TYPE] > 0, PLAYABLE[self.target], out=legal_mask[:NUM_FACES])
+        legal_mask[DRAW_ACTION] = True
+        return legal_mask
 
     def get_legal_actions(self, players, player_id):
-        wild_flag = 0
-        wild_draw_4_flag = 0
-        legal_actions = []
-        hand = players[player_id].hand
-        target = self.target
-        draw_card = self.draw_card
-        
-        if self.action in WILD_DRAW_4:  # type: ignore
-            legal_actions.append('query')
-            legal_actions.append("pass")
-        elif self.action == 'draw' and self.draw_player == self.current_player:
-            if draw_card.trait == 'wild_draw_4':  # type: ignore
-                legal_actions.extend(WILD_DRAW_4)
-            elif draw_card.trait == 'wild':  # type: ignore
-                legal_actions.extend(WILD)
-            else:
-                legal_actions.append(draw_card.str)  # type: ignore
-            legal_actions.append('pass')
-        else:
-            for card in hand: # 记录当前玩家可出牌型
-                if card.type == 'wild':
-                    if card.trait == 'wild_draw_4': # 当前手牌内有 ‘+4’
-                        if wild_draw_4_flag == 0:
-                            wild_draw_4_flag = 1
-                            legal_actions.extend(WILD_DRAW_4)
-                    else: # 当前手牌有 ‘换色’
-                        if wild_flag == 0:
-                            wild_flag = 1
-                            legal_actions.extend(WILD)
-                elif card.color == target.color or card.trait == target.trait:  # type: ignore # 当前手牌有 可出的数字牌或功能牌
-                    legal_actions.append(card.str)
-            legal_actions.append('draw')
-            
-        return legal_actions
-
-    def get_state(self, players, player_id):
+        ''' Get the legal actions of a player
+
+        Args:
+            players (list): The list of UnoPlayer
+            player_id (int): The id of the player
+
+        Returns:
+            (list): A list of legal action strings, ordered by action id
+        '''
+        return [ACTION_LIST[action_id] for action_id in np.flatnonzero(self.get_legal_mask(players, player_id))]
+
+    def get_state(self, players, player_id, legal_mask=None):
         ''' Get player's state
 
         Args:
             players (list): The list of UnoPlayer
             player_id (int): The id of the player
+            legal_mask (numpy.array): The legal mask of the player if it is already known
+
+        Returns:
+            (UnoState): The state, its string fields are built on first access
         '''
-        state = {}
         player = players[player_id]
         opponent = players[1 - player_id]
-        state['hand'] = cards2list(player.hand)
-        state['target'] = self.target.str  # type: ignore
-        state['other_cards'] = cards2list(self.dealer.deck) + cards2list(opponent.hand)
-        state['played_cards'] = cards2list(self.played_cards)
-        state['legal_actions'] = self.get_legal_actions(players, player_id) # 获取当前玩家可出牌型
-        state['num_cards'] = []
-        for player in players: # 统计每个玩家当前手牌数
-            state['num_cards'].append(len(player.hand))
-        return state
+        return UnoState(hand=list(player.hand),
+                        target=self.target,
+                        deck=self.dealer.deck[:self.dealer.cursor].copy(),
+                        opponent_hand=list(opponent.hand),
+                        played_cards=self.played_cards,
+                        num_played=len(self.played_cards),
+                        legal_mask=self.get_legal_mask(players, player_id) if legal_mask is None else legal_mask, # 获取当前玩家可出牌型
+                        hand_counts=player.hand_counts.copy(),
+                        unseen_counts=player.unseen_counts.copy(),
+                        num_cards=[len(player.hand) for player in players]) # 统计每个玩家当前手牌数
+
+    def get_state_hash(self, players):
+        ''' Get the Zobrist hash of the full state: the hands, the order of the deck and the public fields
+
+        Returns:
+            (int): A 64-bit hash
+        '''
+        state_hash = self.dealer.deck_hash + self._get_public_hash() + self._get_drawn_hash()
+        for player in players:
+            state_hash += player.hand_hash
+        return state_hash & MASK
+
+    def get_info_hash(self, players, player_id):
+        ''' Get the Zobrist hash of the information set of a player: its hand, the
+        played cards, the size of the deck and of the other hands and the public fields.
+        The type of a playable drawn card is only hashed for the player who drew it
+
+        Args:
+            players (list): The list of UnoPlayer
+            player_id (int): The id of the player
+
+        Returns:
+            (int): A 64-bit hash
+        '''
+        info_hash = (players[player_id].hand_hash + self._get_public_hash()
+                     + DECK_SIZE_KEYS[self.dealer.cursor] + VIEWER_KEYS[player_id])
+        for player in players:
+            if player.player_id != player_id:
+                info_hash += HAND_SIZE_KEYS[player.player_id][len(player.hand)]
+        if player_id == self.draw_player:
+            info_hash += self._get_drawn_hash()
+        return info_hash & MASK
+
+    def _get_public_hash(self):
+        ''' Hash the played pile and the fields of the round, the card moves are hashed as they happen
+        '''
+        public_hash = (self.played_hash
+                       + TARGET_KEYS[-1 if self.target is None else self.target]
+                       + LAST_TARGET_KEYS[-1 if self.last_target is None else self.last_target]
+                       + CURRENT_PLAYER_KEYS[self.current_player])
+        if self.direction < 0:
+            public_hash += REVERSED_KEY
+        if self.action is not None and ACTION_EFFECT[self.action] == EFFECT_WILD_DRAW_4: # 质疑阶段
+            public_hash += CHALLENGE_KEY
+        elif self._is_drawn_phase(): # 抽到可出的牌，只公开阶段不公开牌型
+            public_hash += DRAWN_KEY
+        if self.is_over:
+            public_hash += OVER_KEY
+        return public_hash
+
+    def _is_drawn_phase(self):
+        return self.action == DRAW_ACTION and self.draw_player == self.current_player
+
+    def _get_drawn_hash(self):
+        ''' Hash the type of the playable drawn card, only known to the player who drew it
+        '''
+        return DRAWN_KEYS[self.draw_card] if self._is_drawn_phase() else 0
+
+    def _add_played(self, face):
+        self.played_cards.append(face)
+        self.played_hash = (self.played_hash + PLAYED_KEYS[face]) & MASK
+
+    def get_snapshot(self):
+        ''' Get what is needed to undo the next steps of the round
+
+        Returns:
+            (tuple): The lengths of the card move logs and the fields a step can change
+        '''
+        return (len(self.dealer.dealt), len(self.removed), self.target, self.last_target,
+                self.direction, self.current_player, self.action, self.draw_player,
+                self.draw_card, self.is_over, self.winner, list(self.payoffs))
+
+    def restore_snapshot(self, players, snapshot):
+        ''' Undo the steps taken since the snapshot
+
+        Args:
+            players (list): The list of UnoPlayer
+            snapshot (tuple): A snapshot from get_snapshot
+        '''
+        (num_dealt, num_removed, self.target, self.last_target,
+         self.direction, self.current_player, self.action, self.draw_player,
+         self.draw_card, self.is_over, self.winner, self.payoffs) = snapshot
+        # cards are dealt after the played card is removed, so undo the deals first
+        self.dealer.undeal_cards(players, len(self.dealer.dealt) - num_dealt)
+        num_played = len(self.played_cards)
+        while len(self.removed) > num_removed:
+            player_id, index, card = self.removed.pop()
+            num_played -= 1
+            self.played_hash = (self.played_hash - PLAYED_KEYS[self.played_cards[num_played]]) & MASK
+            players[player_id].add_card(card, index)
+            self._reveal(players, card, player_id, -1)
+        if num_played < len(self.played_cards):
+            # rebind instead of popping, the states built so far keep the list they captured unchanged
+            self.played_cards = self.played_cards[:num_played]
+
+    def clone(self, dealer, np_random):
+        ''' Copy the round onto a cloned dealer, the clone starts with an empty move log
+
+        Args:
+            dealer (object): The cloned UnoDealer
+            np_random (object): The random state of the new round
+
+        Returns:
+            (object): The object of UnoRound
+        '''
+        round = UnoRound.__new__(UnoRound)
+        round.__dict__.update(self.__dict__)
+        round.np_random = np_random
+        round.dealer = dealer
+        round.played_cards = list(self.played_cards)
+        round.removed = []
+        round.payoffs = list(self.payoffs)
+        return round
 
     def get_scores(self, players):
-        '''Get player's payoffs'''
+        '''Get player's payoffs, it can also be read in the middle of a game'''
         # 计分策略：取二、三、四名游戏结束时的手牌分总和正数与第一名的手牌分相加
-        winner_payoffs = 0
-        for index, player in enumerate(players):
-            player_score = self.count_hand_score(player.hand)
-            self.payoffs[index] = player_score
-            winner_payoffs += -(player_score)
-            
-        if self.winner is None:
-            self.winner = UnoJudger.judge_winner(self.payoffs)
+        self.payoffs = [-player.hand_score for player in players]
+        winner = self.get_winner()
         
-        if self.winner is not None and len(self.winner) == 1:
-            self.payoffs[self.winner[0]] += winner_payoffs
+        if winner is not None and len(winner) == 1:
+            self.payoffs[winner[0]] -= sum(self.payoffs)
         else:
             self.payoffs = [0 for _ in range(self.num_players)]
         
@@ -193,17 +311,13 @@ class UnoRound:
     
     def get_payoffs_train(self, players):
         '''Get player's payoffs for training'''
-        # 计分策略：取二、三、四名游戏结束时的手牌分总和正数与第一名的手牌分相加
-        for index, player in enumerate(players):
-            self.payoffs[index] = self.count_hand_score(player.hand)
-            
-        if self.winner is None:
-            self.winner = UnoJudger.judge_winner(self.payoffs)
+        self.payoffs = [-player.hand_score for player in players]
+        winner = self.get_winner()
         
         for index, _ in enumerate(self.payoffs):
-            if not self.winner: # 平局时，奖励值均为 0
+            if not winner: # 平局时，奖励值均为 0
                 self.payoffs[index] = 0
-            elif index in self.winner:
+            elif index in winner:
                 self.payoffs[index] = 1
             else:
                 self.payoffs[index] = -1
@@ -212,77 +326,97 @@ class UnoRound:
 
     def get_payoffs(self, players):
         '''Get player's payoffs for evaluating'''
-        # 计分策略：取二、三、四名游戏结束时的手牌分总和正数与第一名的手牌分相加
-        for index, player in enumerate(players):
-            self.payoffs[index] = self.count_hand_score(player.hand)
-            
-        if self.winner is None:
-            self.winner = UnoJudger.judge_winner(self.payoffs)
+        self.payoffs = [-player.hand_score for player in players]
+        winner = self.get_winner()
         
         # 评估时，记赢家为 +1 分，其余平局和输家不计分
         for index, _ in enumerate(self.payoffs):
-            if self.winner is not None and index in self.winner: # 赢家记 1 分
+            if winner is not None and index in winner: # 赢家记 1 分
                 self.payoffs[index] = 1
             else: # 平局或输家记 0 分
                 self.payoffs[index] = 0
                 
         return self.payoffs
 
+    def get_winner(self):
+        ''' Get the winner, judged by the hand scores in self.payoffs if no one has emptied the hand
+
+        Returns:
+            (list): The id of the winner, None for a tie
+        '''
+        if self.winner is not None:
+            return self.winner
+        winner = UnoJudger.judge_winner(self.payoffs)
+        if self.is_over: # 对局未结束时只按当前手牌分判断，不记录赢家
+            self.winner = winner
+        return winner
+
     def count_hand_score(self, cards):
         '''Count player hand card score'''
-        count = 0
-        for card in cards:
-            if card.type == 'number':
-                count += int(card.trait)
-            elif card.type == 'action':
-                count += 20
-            elif card.type == 'wild':
-                count += 50
-        return -count
-
-    def replace_deck(self):
+        return -int(TYPE_SCORE[CARD_TYPE[cards]].sum())
+
+    def replace_deck(self, players):
         ''' Add cards have been played to deck
         '''
-        self.dealer.deck.extend(self.played_cards)
-        self.dealer.shuffle()
+        # played cards are the ones neither in the deck nor in any hand
+        in_play = np.zeros(NUM_CARDS, dtype=bool)
+        in_play[self.dealer.deck[:self.dealer.cursor]] = True
+        for player in players:
+            in_play[player.hand] = True
+        self.dealer.refill(np.flatnonzero(~in_play))
         self.played_cards = []
+        self.played_hash = 0
 
     def is_draw_available(self, card):
         '''Judge the card whether is available'''
         # draw a card with the same color or the same trait of target —— 抽牌（数字牌或功能牌）
-        if card.color == self.target.color or card.trait == self.target.trait:  # type: ignore
+        if CARD_COLOR[card] == FACE_COLOR[self.target] or CARD_TRAIT[card] == FACE_TRAIT[self.target]:
             return None
         # draw a wild card —— 抽牌（万能牌）
-        elif card.type == 'wild':
+        elif CARD_KIND[card] == WILD_CARD:
             return None
         # draw a card with the diffrent color of target —— 抽牌（其他牌）
         self.current_player = (self.current_player + self.direction) % self.num_players
 
-    def is_legal_query(self, hand, target):
-        for card in hand: # 只负责检查打出 ‘+4’ 牌的玩家手上有无同颜色的牌型
-            if card.type != 'wild' and card.color == target.color:  # type: ignore # 当前手牌有 可出的同色牌
-                return True
-        return False
+    def _reveal(self, players, card, owner, num=1):
+        ''' Remove a card that becomes public from the unseen cards of every player but its owner
+
+        Args:
+            players (list): The list of UnoPlayer
+            card (int): The card id
+            owner (int): The id of the player who played the card, None for the top card
+            num (int): 1 to reveal the card, -1 to undo it
+        '''
+        card_type = CARD_TYPE[card]
+        for player in players:
+            if player.player_id != owner:
+                player.unseen_counts[card_type] -= num
+
+    def is_legal_query(self, hand_counts, target):
+        # 只负责检查打出 ‘+4’ 牌的玩家手上有无同颜色的牌型
+        color = FACE_COLOR[target]
+        return bool(hand_counts[color * 13:(color + 1) * 13].any())
 
     def _perform_draw_action(self, players):
         # replace deck if there is no card in draw pile
-        if not self.dealer.deck: # 当牌盒内的牌不够时
+        if not self.dealer.cursor: # 当牌盒内的牌不够时
             # 游戏循环：从已出牌型中重新洗牌抽牌
-            # self.replace_deck()
+            # self.replace_deck(players)
             # 游戏结束：统计所有玩家当前牌值
             self.is_over = True
             return None
 
-        self.draw_card = self.dealer.deck.pop()
-        players[self.current_player].hand.append(self.draw_card)
+        player = players[self.current_player]
+        self.dealer.deal_cards(player, 1)
+        self.draw_card = player.hand[-1]
         
         self.is_draw_available(self.draw_card) # 如果抽牌不合法，则置玩家为下一玩家
 
     def _perform_pass_action(self, players):
-        if self.target.trait == 'wild_draw_4':  # type: ignore
-            if len(self.dealer.deck) < 4:
+        if ACTION_EFFECT[self.target] == EFFECT_WILD_DRAW_4:
+            if self.dealer.cursor < 4:
                 # 游戏循环：从已出牌型中重新洗牌抽牌
-                # self.replace_deck()
+                # self.replace_deck(players)
                 # 游戏结束：统计所有玩家当前牌值
                 self.is_over = True
                 return None
@@ -293,42 +427,43 @@ class UnoRound:
         last_player = players[(self.current_player - self.direction) % self.num_players]
         
         # 质疑后分为质疑成功和质疑失败操作
-        if self.is_legal_query(last_player.hand, self.last_target): # 质疑成功
-            if len(self.dealer.deck) < 4:
+        if self.is_legal_query(last_player.hand_counts, self.last_target): # 质疑成功
+            if self.dealer.cursor < 4:
                     # 游戏循环：从已出牌型中重新洗牌抽牌
-                    # self.replace_deck()
+                    # self.replace_deck(players)
                     # 游戏结束：统计所有玩家当前牌值
                     self.is_over = True
                     return None
             self.dealer.deal_cards(last_player, 4)
         else: # 质疑失败
-            if len(self.dealer.deck) < 6:
+            if self.dealer.cursor < 6:
                     # 游戏循环：从已出牌型中重新洗牌抽牌
-                    # self.replace_deck()
+                    # self.replace_deck(players)
                     # 游戏结束：统计所有玩家当前牌值
                     self.is_over = True
                     return None
             self.dealer.deal_cards(players[self.current_player], 6)
             self.current_player = (self.current_player + self.direction) % self.num_players
         
-    def _preform_non_number_action(self, players, card):
+    def _preform_non_number_action(self, players, action_id):
         current = self.current_player
         direction = self.direction
         num_players = self.num_players
+        effect = ACTION_EFFECT[action_id]
 
         # perform reverse card —— 反转操作，更新方向
-        if card.trait == 'reverse':
+        if effect == EFFECT_REVERSE:
             self.direction = -1 * direction
 
         # perfrom skip card —— 跳过操作，禁止下家出牌
-        elif card.trait == 'skip':
+        elif effect == EFFECT_SKIP:
             current = (current + direction) % num_players
 
         # perform draw_2 card —— ‘+2’操作，给下家加牌并跳过
-        elif card.trait == 'draw_2':
-            if len(self.dealer.deck) < 2: # 当牌盒内的牌不够时
+        elif effect == EFFECT_DRAW_2:
+            if self.dealer.cursor < 2: # 当牌盒内的牌不够时
                 # 游戏循环：从已出牌型中重新洗牌抽牌
-                # self.replace_deck()
+                # self.replace_deck(players)
                 # 游戏结束：统计所有玩家当前牌值
                 self.is_over = True
                 return None
@@ -336,8 +471,8 @@ class UnoRound:
             current = (current + direction) % num_players
 
         # perfrom wild_draw_4 card —— ‘+4’操作
-        elif card.trait == 'wild_draw_4':
+        elif effect == EFFECT_WILD_DRAW_4:
             self.last_target = self.target
         
         self.current_player = (current + self.direction) % num_players
-        self.target = card
+        self.target = action_id
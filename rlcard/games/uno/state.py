@@ -0,0 +1,168 @@
+import numpy as np
+
+from rlcard.games.uno.utils import ACTION_LIST, cards2list, faces2list
+
+# the fields of a state, in the order of the dict of UnoRound.get_state
+FIELDS = ('hand', 'target', 'target_id', 'other_cards', 'played_cards',
+          'hand_counts', 'unseen_counts', 'legal_actions', 'legal_mask', 'num_cards')
+
+# the string fields, built on first access
+LAZY_FIELDS = ('hand', 'target', 'other_cards', 'played_cards', 'legal_actions')
+
+
+class UnoState(dict):
+    ''' The raw state of a player, the dict of UnoRound.get_state
+
+    The string fields 'hand', 'target', 'other_cards', 'played_cards' and
+    'legal_actions' are built on first access and then stored in the dict. They
+    are built from cheap references taken when the state is created: a copy of
+    the deck slice, the opponent's hand, and the played cards list with its
+    length. The round only appends to the played cards list, step_back and a
+    refill of the deck replace it, so the state stays valid as the game moves
+    on or steps back. Iterating, comparing, copying or pickling the state builds
+    all of them first, so it behaves like a plain dict and pickles into one with
+    all the fields.
+    '''
+
+    def __init__(self, hand, target, deck, opponent_hand, played_cards, num_played, legal_mask, hand_counts, unseen_counts, num_cards):
+        ''' Initialize the state
+
+        Args:
+            hand (list): The card ids in hand
+            target (int): The face id of the target
+            deck (numpy.array): A copy of the card ids left in the deck, from the bottom
+            opponent_hand (list): A copy of the card ids in the opponent's hand
+            played_cards (list): The face ids of the played cards of the round
+            num_played (int): The number of played cards when the state is created
+            legal_mask (numpy.array): The legal action mask of the player
+            hand_counts (numpy.array): The number of cards of each type in hand
+            unseen_counts (numpy.array): The number of unseen cards of each type
+            num_cards (list): The number of cards in each player's hand
+        '''
+        super().__init__(target_id=target,
+                         hand_counts=hand_counts,
+                         unseen_counts=unseen_counts,
+                         legal_mask=legal_mask,
+                         num_cards=num_cards)
+        self._hand = hand
+        self._target = target
+        self._deck = deck
+        self._opponent_hand = opponent_hand
+        self._played_cards = played_cards
+        self._num_played = num_played
+        self._legal_mask = legal_mask
+        self._pending = set(LAZY_FIELDS)
+
+    @classmethod
+    def _from_items(cls, items):
+        ''' Rebuild a state whose fields are all built, used by pickle and copy
+        '''
+        state = cls.__new__(cls)
+        dict.update(state, items)
+        state._pending = set()
+        return state
+
+    def __missing__(self, key):
+        if key not in self._pending:
+            raise KeyError(key)
+        self._pending.discard(key)
+        value = getattr(self, '_get_' + key)()
+        dict.__setitem__(self, key, value)
+        return value
+
+    def _materialize(self):
+        ''' Build the pending fields and put all the fields in the order of FIELDS
+        '''
+        if not self._pending:
+            return
+        for key in list(self._pending):
+            self[key]
+        items = [(key, dict.__getitem__(self, key)) for key in FIELDS if dict.__contains__(self, key)]
+        items += [(key, value) for key, value in dict.items(self) if key not in FIELDS]
+        dict.clear(self)
+        dict.update(self, items)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._pending
+
+    def __len__(self):
+        return dict.__len__(self) + len(self._pending)
+
+    def __setitem__(self, key, value):
+        self._pending.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if key in self._pending:
+            self._pending.discard(key)
+        else:
+            dict.__delitem__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key, *default):
+        if key in self._pending:
+            self[key]
+        return dict.pop(self, key, *default)
+
+    def __iter__(self):
+        self._materialize()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self._materialize()
+        return dict.keys(self)
+
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+
+    def copy(self):
+        self._materialize()
+        return dict(dict.items(self))
+
+    def __eq__(self, other):
+        self._materialize()
+        if isinstance(other, UnoState):
+            other._materialize()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._materialize()
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        self._materialize()
+        return (self._from_items, (list(dict.items(self)),))
+
+    def _get_hand(self):
+        return cards2list(self._hand)
+
+    def _get_target(self):
+        return ACTION_LIST[self._target]
+
+    def _get_other_cards(self):
+        return cards2list(self._deck.tolist() + self._opponent_hand)
+
+    def _get_played_cards(self):
+        return faces2list(self._played_cards[:self._num_played])
+
+    def _get_legal_actions(self):
+        return [ACTION_LIST[action_id] for action_id in np.flatnonzero(self._legal_mask)]
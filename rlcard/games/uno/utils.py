@@ -5,7 +5,6 @@ from collections import OrderedDict
 import numpy as np
 
 import rlcard
-from rlcard.games.uno.card import UnoCard as Card
 
 # Read required docs
 ROOT_PATH = rlcard.__path__[0]  # type: ignore
@@ -28,43 +27,169 @@ WILD = ['r-wild', 'g-wild', 'b-wild', 'y-wild']
 WILD_DRAW_4 = ['r-wild_draw_4', 'g-wild_draw_4', 'b-wild_draw_4', 'y-wild_draw_4']
 
 
-def init_deck():
-    ''' Generate uno deck of 108 cards
-    '''
-    deck = []
-    card_info = Card.info
-    for color in card_info['color']:
+# card categories —— 牌的种类（数字牌、功能牌、万能牌）
+NUMBER, ACTION, WILD_CARD = 0, 1, 2
+
+# traits with special effects
+SKIP = TRAIT_MAP['skip']
+REVERSE = TRAIT_MAP['reverse']
+DRAW_2 = TRAIT_MAP['draw_2']
+WILD_TRAIT = TRAIT_MAP['wild']
+WILD_DRAW_4_TRAIT = TRAIT_MAP['wild_draw_4']
+
+# The engine works on small integers instead of UnoCard objects:
+#   card id: 0..107, one per physical card in the order of init_deck
+#   type id: 0..53, color * 13 + trait for colored cards, 52 for wild, 53 for wild_draw_4
+#   face id: 0..59, color * 15 + trait, shared with the ids of ACTION_SPACE
+# Wild cards keep the color printed on them as their copy index.
+NUM_CARDS = 108
+NUM_CARD_TYPES = 54
+NUM_FACES = 60
+
+TYPE_COLOR = np.full(NUM_CARD_TYPES, -1, dtype=np.int8) # 万能牌无颜色，记为 -1
+TYPE_TRAIT = np.zeros(NUM_CARD_TYPES, dtype=np.int8)
+TYPE_KIND = np.zeros(NUM_CARD_TYPES, dtype=np.int8)
+TYPE_SCORE = np.zeros(NUM_CARD_TYPES, dtype=np.int64)
+
+FACE_COLOR = np.arange(NUM_FACES, dtype=np.int8) // 15
+FACE_TRAIT = np.arange(NUM_FACES, dtype=np.int8) % 15
+FACE_TYPE = np.zeros(NUM_FACES, dtype=np.int8)
+
+CARD_TYPE = np.zeros(NUM_CARDS, dtype=np.int8)
+CARD_FACE = np.zeros(NUM_CARDS, dtype=np.int8)
+CARD_STR = []
+
+def _type_of(color, trait):
+    if trait == WILD_TRAIT:
+        return 52
+    if trait == WILD_DRAW_4_TRAIT:
+        return 53
+    return color * 13 + trait
+
+for _face in range(NUM_FACES):
+    _color, _trait = divmod(_face, 15)
+    _type = _type_of(_color, _trait)
+    FACE_TYPE[_face] = _type
+    TYPE_TRAIT[_type] = _trait
+    if _trait < 10:
+        TYPE_COLOR[_type] = _color
+        TYPE_KIND[_type] = NUMBER
+        TYPE_SCORE[_type] = _trait
+    elif _trait < WILD_TRAIT:
+        TYPE_COLOR[_type] = _color
+        TYPE_KIND[_type] = ACTION
+        TYPE_SCORE[_type] = 20
+    else:
+        TYPE_KIND[_type] = WILD_CARD
+        TYPE_SCORE[_type] = 50
+    # 除 0 和万能牌外，每种牌各有两张
+    for _ in range(1 if _trait == 0 or _trait >= WILD_TRAIT else 2):
+        _card = len(CARD_STR)
+        CARD_TYPE[_card] = _type
+        CARD_FACE[_card] = _face
+        CARD_STR.append(ACTION_LIST[_face])
+
+CARD_COLOR = FACE_COLOR[CARD_FACE]
+CARD_TRAIT = FACE_TRAIT[CARD_FACE]
+CARD_KIND = TYPE_KIND[CARD_TYPE]
+CARD_SCORE = TYPE_SCORE[CARD_TYPE].tolist() # 每张牌的分值，用于增量计算手牌分
+
+# the number of cards of each type in a full deck
+TYPE_COUNT = np.bincount(CARD_TYPE, minlength=NUM_CARD_TYPES).astype(np.int8)
+
+# encoding tables of count vectors —— 牌型计数编码表
+# row type * 5 + count of HAND_BITS is the bit set in the layout of encode_hand,
+# HAND_BIT_VALUES is 0 where no bit is set, OTHER_BITS is the same for encode_other_cards
+COUNT_ROWS = np.arange(NUM_CARD_TYPES) * 5
+HAND_BITS = np.zeros(NUM_CARD_TYPES * 5, dtype=np.intp)
+HAND_BIT_VALUES = np.zeros(NUM_CARD_TYPES * 5, dtype=int)
+OTHER_BITS = np.zeros(NUM_CARD_TYPES * 5, dtype=np.intp)
+for _type in range(NUM_CARD_TYPES):
+    for _count in range(5):
+        _row = _type * 5 + _count
+        if _type >= 52: # 万能牌按张数 one-hot
+            HAND_BITS[_row] = 100 + (_type - 52) * 5 + _count
+            HAND_BIT_VALUES[_row] = 1
+            OTHER_BITS[_row] = 152 + (_type - 52) * 5 + _count
+            continue
+        _color, _trait = divmod(_type, 13)
+        HAND_BITS[_row] = _type
+        OTHER_BITS[_row] = _type
+        if _count == 1:
+            HAND_BIT_VALUES[_row] = 1
+            OTHER_BITS[_row] = 52 + _type
+        elif _count == 2 and _trait > 0:
+            HAND_BITS[_row] = 52 + _color * 12 + _trait - 1
+            HAND_BIT_VALUES[_row] = 1
+            OTHER_BITS[_row] = 104 + _color * 12 + _trait - 1
+# HAND_BIT_VALUES in the dtypes of the observations, so that writing them needs no cast
+HAND_BIT_VALUES_BY_DTYPE = {np.dtype(_dtype): HAND_BIT_VALUES.astype(_dtype) for _dtype in (int, np.int8, np.uint8, np.float32)}
+
+# legal move tables —— 合法动作掩码表
+NUM_ACTIONS = len(ACTION_LIST)
+DRAW_ACTION = ACTION_SPACE['draw']
+QUERY_ACTION = ACTION_SPACE['query']
+PASS_ACTION = ACTION_SPACE['pass']
+
+# PLAYABLE[target][face] is True if a card of that face can follow the target
+PLAYABLE = ((FACE_COLOR[:, None] == FACE_COLOR[None, :])
+            | (FACE_TRAIT[:, None] == FACE_TRAIT[None, :])
+            | (FACE_TRAIT[None, :] >= WILD_TRAIT))
+
+# the legal actions after a 'wild_draw_4' was played
+QUERY_MASK = np.zeros(NUM_ACTIONS, dtype=bool)
+QUERY_MASK[[QUERY_ACTION, PASS_ACTION]] = True
+
+# DRAWN_MASK[card] are the legal actions right after drawing that card
+DRAWN_MASK = np.zeros((NUM_CARDS, NUM_ACTIONS), dtype=bool)
+DRAWN_MASK[:, :NUM_FACES] = FACE_TYPE[None, :] == CARD_TYPE[:, None]
+DRAWN_MASK[:, PASS_ACTION] = True
+
+# one-hot rows of the action ids as in encode_action, the last row is no action —— 动作 one-hot 表
+NO_ACTION = NUM_ACTIONS
+ACTION_ONE_HOT = np.eye(NUM_ACTIONS + 1, NUM_ACTIONS, dtype=int)
+
+# effect of each action id —— 动作效果
+(EFFECT_NUMBER, EFFECT_SKIP, EFFECT_REVERSE, EFFECT_DRAW_2, EFFECT_WILD,
+ EFFECT_WILD_DRAW_4, EFFECT_DRAW, EFFECT_QUERY, EFFECT_PASS) = range(9)
+
+# action tables used once per step, kept as lists so lookups give plain ints
+# ACTION_TYPE is -1 for draw, query and pass
+ACTION_TYPE = FACE_TYPE.tolist() + [-1] * 3
+ACTION_EFFECT = [EFFECT_NUMBER if _trait < 10 else EFFECT_SKIP + _trait - SKIP
+                 for _trait in FACE_TRAIT.tolist()] + [EFFECT_DRAW, EFFECT_QUERY, EFFECT_PASS]
 
-        # init number cards —— 初始化数字牌
-        for num in card_info['trait'][:10]:
-            deck.append(Card('number', color, num))
-            if num != '0':
-                deck.append(Card('number', color, num))
 
-        # init action cards —— 初始化功能牌
-        for action in card_info['trait'][10:13]:
-            deck.append(Card('action', color, action))
-            deck.append(Card('action', color, action))
+def init_deck():
+    ''' Generate uno deck of 108 cards
 
-        # init wild cards —— 初始化万能牌
-        for wild in card_info['trait'][-2:]:
-            deck.append(Card('wild', color, wild))
-    return deck
+    Returns:
+        (list): list of card ids, see CARD_STR for their string form
+    '''
+    return list(range(NUM_CARDS))
 
 
 def cards2list(cards):
     ''' Get the corresponding string representation of cards
 
     Args:
-        cards (list): list of UnoCards objects
+        cards (list): list of card ids
 
     Returns:
         (string): string representation of cards
     '''
-    cards_list = []
-    for card in cards:
-        cards_list.append(card.get_str())
-    return cards_list
+    return [CARD_STR[card] for card in cards]
+
+def faces2list(faces):
+    ''' Get the corresponding string representation of card faces
+
+    Args:
+        faces (list): list of face ids
+
+    Returns:
+        (list): string representation of faces
+    '''
+    return [ACTION_LIST[face] for face in faces]
 
 def hand2dict(hand):
     ''' Get the corresponding dict representation of hand
@@ -152,6 +277,60 @@ def encode_hand(hand):
         
     return np.concatenate((plane[:1][:][:].flatten(), plane2.flatten(), wild_count, wild_4_count))
 
+def encode_hand_counts(hand_counts, out=None):
+    ''' Encode a count vector over the 54 card types the same way as encode_hand
+
+    Args:
+        hand_counts (array): the number of cards of each type
+        out (array): 110 numpy array to write into, a new one by default
+
+    Returns:
+        (array): 110 numpy array
+    '''
+    if out is None:
+        out = np.zeros(110, dtype=int)
+    else:
+        out[:] = 0
+    rows = COUNT_ROWS + hand_counts # 每种牌型恰好写一位
+    out[HAND_BITS[rows]] = HAND_BIT_VALUES_BY_DTYPE.get(out.dtype, HAND_BIT_VALUES)[rows]
+    return out
+
+def encode_hand_counts_batch(hand_counts, out=None):
+    ''' Encode stacked count vectors the same way as encode_hand_counts
+
+    Args:
+        hand_counts (array): N * 54 numpy array of the number of cards of each type
+        out (array): N * 110 numpy array to write into, a new one by default
+
+    Returns:
+        (array): N * 110 numpy array
+    '''
+    if out is None:
+        out = np.zeros((len(hand_counts), 110), dtype=int)
+    else:
+        out[:] = 0
+    rows = COUNT_ROWS + hand_counts
+    values = HAND_BIT_VALUES_BY_DTYPE.get(out.dtype, HAND_BIT_VALUES)
+    out[np.arange(len(hand_counts))[:, None], HAND_BITS[rows]] = values[rows]
+    return out
+
+def encode_other_cards_counts(counts, out=None):
+    ''' Encode a count vector over the 54 card types the same way as encode_other_cards
+
+    Args:
+        counts (array): the number of cards of each type
+        out (array): 162 numpy array to write into, a new one by default
+
+    Returns:
+        (array): 162 numpy array
+    '''
+    if out is None:
+        out = np.zeros(162, dtype=int)
+    else:
+        out[:] = 0
+    out[OTHER_BITS[COUNT_ROWS + counts]] = 1 # 每种牌型恰好置一位
+    return out
+
 def encode_other_cards(hand):
     ''' Encode hand and represerve it into plane
 
@@ -243,6 +422,18 @@ def encode_action_sequence_12(action_list, size=63):
     plane = plane.reshape(3, 252)
     return plane
 
+def get_one_hot_index(num_left_cards, max_num_cards=10):
+    ''' Get the position of the bit set by get_one_hot_array
+    '''
+    if num_left_cards > max_num_cards:
+        return max_num_cards - 1
+    return (num_left_cards - 1) % max_num_cards
+
+def get_one_hot_indices(num_left_cards, max_num_cards=10):
+    ''' Get the positions of the bits set by get_one_hot_array for an array of card numbers
+    '''
+    return np.where(num_left_cards > max_num_cards, max_num_cards - 1, (num_left_cards - 1) % max_num_cards)
+
 def get_one_hot_array(num_left_cards, max_num_cards=10):
     one_hot = np.zeros(max_num_cards, dtype=int)
     if num_left_cards > max_num_cards:
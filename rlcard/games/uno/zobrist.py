@@ -0,0 +1,179 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from rlcard.games.uno.utils import NUM_CARDS, NUM_CARD_TYPES, NUM_FACES, CARD_TYPE, FACE_TYPE
+
+# Zobrist keys of UNO positions. A hash is the sum modulo 2 ** 64 of the keys
+# of its parts instead of their xor, so that the copies of a card type in a
+# hand or in the played pile do not cancel out. Moving a card adds one key and
+# subtracts another. The keys come from a fixed seed so that hashes agree
+# between processes.
+MASK = (1 << 64) - 1
+MAX_PLAYERS = 4
+
+_random = np.random.RandomState(20220613)
+
+def _keys(*shape):
+    return _random.randint(0, 2 ** 64, size=shape, dtype=np.uint64)
+
+_TYPE_KEYS = _keys(MAX_PLAYERS + 1, NUM_CARD_TYPES) # 各玩家手牌和已出牌堆中每种牌的键
+
+# HAND_KEYS[player_id][card] is the key of a card in a hand, by its type
+HAND_KEYS = _TYPE_KEYS[:MAX_PLAYERS][:, CARD_TYPE].tolist()
+# PLAYED_KEYS[face] is the key of a played card, the played pile holds face ids
+PLAYED_KEYS = _TYPE_KEYS[MAX_PLAYERS][FACE_TYPE].tolist()
+# DECK_KEYS[position][card], a card type at a position of the deck
+_DECK_KEYS = _keys(NUM_CARDS, NUM_CARD_TYPES)[:, CARD_TYPE]
+DECK_KEYS = _DECK_KEYS.tolist()
+
+# keys of the fields of the round, None is the last entry
+TARGET_KEYS = _keys(NUM_FACES + 1).tolist()
+LAST_TARGET_KEYS = _keys(NUM_FACES + 1).tolist()
+CURRENT_PLAYER_KEYS = _keys(MAX_PLAYERS).tolist()
+REVERSED_KEY = int(_keys(1)[0])
+CHALLENGE_KEY = int(_keys(1)[0])
+DRAWN_KEYS = _keys(NUM_CARD_TYPES)[CARD_TYPE].tolist() # 抽到可出的牌，以牌型为键，只有抽牌玩家可见
+OVER_KEY = int(_keys(1)[0])
+# the sizes of the deck and of the hands of the other players in an information set
+DECK_SIZE_KEYS = _keys(NUM_CARDS + 1).tolist()
+HAND_SIZE_KEYS = _keys(MAX_PLAYERS, NUM_CARDS + 1).tolist()
+VIEWER_KEYS = _keys(MAX_PLAYERS).tolist()
+# the public part of a playable drawn card: every player sees the phase but not the card
+DRAWN_KEY = int(_keys(1)[0])
+
+del _random
+
+
+def hash_hand(player_id, cards):
+    ''' Hash the cards in a hand
+
+    Args:
+        player_id (int): The id of the player holding the cards
+        cards (list): The card ids
+
+    Returns:
+        (int): The hash of the hand
+    '''
+    return sum(HAND_KEYS[player_id][card] for card in cards) & MASK
+
+def hash_played(faces):
+    ''' Hash the played pile
+
+    Args:
+        faces (list): The face ids of the played cards
+
+    Returns:
+        (int): The hash of the played cards
+    '''
+    return sum(PLAYED_KEYS[face] for face in faces) & MASK
+
+def hash_deck(deck, cursor):
+    ''' Hash the order of the cards left in a deck
+
+    Args:
+        deck (numpy.array): The card ids of the deck
+        cursor (int): The number of cards left
+
+    Returns:
+        (int): The hash of the deck
+    '''
+    return int(_DECK_KEYS[np.arange(cursor), deck[:cursor]].sum()) & MASK
+
+
+class TranspositionTable:
+    ''' A bounded map from position hashes to values such as search results or network outputs
+
+    Policies when the table is full or a slot is taken:
+        'always': a slot indexed by the hash keeps the newest entry
+        'depth': a slot indexed by the hash keeps the entry with the greater depth,
+          ties go to the newest entry
+        'lru': the least recently used entry is dropped
+    '''
+
+    def __init__(self, capacity, policy='always'):
+        ''' Initialize the table
+
+        Args:
+            capacity (int): The maximum number of entries
+            policy (str): The replacement policy, 'always', 'depth' or 'lru'
+        '''
+        if policy not in ('always', 'depth', 'lru'):
+            raise ValueError('Unknown replacement policy {}'.format(policy))
+        self.capacity = capacity
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def clear(self):
+        ''' Drop all entries
+        '''
+        if self.policy == 'lru':
+            self.entries = OrderedDict()
+        else:
+            self.keys = [None] * self.capacity
+            self.values = [None] * self.capacity
+            self.depths = [0] * self.capacity
+        self.size = 0
+
+    def get(self, key, default=None):
+        ''' Look up a hash
+
+        Args:
+            key (int): The hash of a position
+            default (object): Returned when the hash is not in the table
+
+        Returns:
+            (object): The stored value or default
+        '''
+        if self.policy == 'lru':
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        else:
+            slot = key % self.capacity
+            if self.keys[slot] == key:
+                self.hits += 1
+                return self.values[slot]
+        self.misses += 1
+        return default
+
+    def put(self, key, value, depth=0):
+        ''' Store a value under a hash
+
+        Args:
+            key (int): The hash of a position
+            value (object): The value to store
+            depth (int): The search depth or visit count behind the value, used by the 'depth' policy
+
+        Returns:
+            (boolean): True if the value is stored
+        '''
+        if self.policy == 'lru':
+            if key not in self.entries:
+                if len(self.entries) >= self.capacity:
+                    self.entries.popitem(last=False)
+                self.size = len(self.entries) + 1
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            return True
+
+        slot = key % self.capacity
+        if self.keys[slot] is None:
+            self.size += 1
+        elif self.policy == 'depth' and self.keys[slot] != key and depth < self.depths[slot]:
+            return False
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.depths[slot] = depth
+        return True
+
+    def __contains__(self, key):
+        if self.policy == 'lru':
+            return key in self.entries
+        return self.keys[key % self.capacity] == key
+
+    def __len__(self):
+        return self.size
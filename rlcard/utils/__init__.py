@@ -1,3 +1,4 @@
 from rlcard.utils.logger import Logger
 from rlcard.utils import seeding
 from rlcard.utils.utils import *
+from rlcard.utils.trajectory import TrajectoryColumns
@@ -0,0 +1,155 @@
+import numpy as np
+
+from rlcard.utils.utils import get_packed_size, pack_obs
+
+
+class TrajectoryColumns:
+    ''' Preallocated per-player columns that Env.run(columns=...) writes the decisions of a game into
+
+    Row i of a player is its i-th decision of the game. The columns are:
+        x, z (or obs when packed): the observation
+        legal_mask: the legal actions
+        action: the action taken
+        reward: the payoff of the player on its last decision, 0 elsewhere
+        done: True on the last decision
+        next_index: the row of the next decision of the same player, -1 after the last one
+    The columns are reused by the next game, copy what has to be kept.
+    '''
+
+    def __init__(self, num_players, x_shape, z_shape=(4, 126), num_actions=63, max_steps=256, pack=False, dtype=np.int8):
+        ''' Allocate the columns
+
+        Args:
+            num_players (int): The number of players
+            x_shape (tuple): The shape of x_batch
+            z_shape (tuple): The shape of z_batch
+            num_actions (int): The size of the legal mask
+            max_steps (int): The decisions of a player kept without growing the columns
+            pack (boolean): True to keep x_batch and z_batch packed into obs by pack_obs
+            dtype (type): The dtype of x and z when they are not packed
+        '''
+        self.num_players = num_players
+        self.x_shape = tuple(x_shape)
+        self.z_shape = tuple(z_shape)
+        self.num_actions = num_actions
+        self.pack = pack
+        self.dtype = dtype
+        self.max_steps = 0
+        self.length = np.zeros(num_players, dtype=np.int64)
+        self.payoffs = np.zeros(num_players, dtype=np.float32)
+        self._allocate(max_steps)
+
+    def _allocate(self, max_steps):
+        ''' Allocate columns of max_steps rows, the rows written so far are kept
+        '''
+        shapes = {
+            'legal_mask': ((self.num_actions,), bool),
+            'action': ((), np.int64),
+            'reward': ((), np.float32),
+            'done': ((), bool),
+            'next_index': ((), np.int64),
+        }
+        if self.pack:
+            shapes['obs'] = ((get_packed_size(int(np.prod(self.x_shape)), self.z_shape),), np.uint8)
+        else:
+            shapes['x'] = (self.x_shape, self.dtype)
+            shapes['z'] = (self.z_shape, self.dtype)
+        for key, (shape, dtype) in shapes.items():
+            column = np.zeros((self.num_players, max_steps) + shape, dtype=dtype)
+            if self.max_steps:
+                column[:, :self.max_steps] = getattr(self, key)
+            setattr(self, key, column)
+        self.max_steps = max_steps
+
+    def reset(self):
+        ''' Start a new game
+        '''
+        self.length[:] = 0
+        self.payoffs[:] = 0
+
+    def add(self, player_id, state):
+        ''' Write a decision of a player, the columns double in size when full
+
+        Args:
+            player_id (int): The id of the player
+            state (dict): The extracted state the player acts on
+        '''
+        row = self.length[player_id]
+        if row == self.max_steps:
+            self._allocate(self.max_steps * 2)
+        if self.pack:
+            self.obs[player_id, row] = pack_obs(state['x_batch'], state['z_batch'])
+        else:
+            self.x[player_id, row] = state['x_batch']
+            self.z[player_id, row] = state['z_batch']
+        self.legal_mask[player_id, row] = state['legal_mask']
+        self.length[player_id] = row + 1
+
+    def set_action(self, player_id, action):
+        ''' Write the action of the last decision of a player
+
+        Args:
+            player_id (int): The id of the player
+            action (int): The action id
+        '''
+        self.action[player_id, self.length[player_id] - 1] = action
+
+    def finish(self, payoffs):
+        ''' Write the rewards, dones and next indices once the game is over
+
+        Args:
+            payoffs (list): The payoff of each player
+        '''
+        self.payoffs[:] = payoffs
+        rows = np.arange(self.max_steps)
+        self.reward[:] = 0
+        self.next_index[:] = np.where(rows[None, :] + 1 < self.length[:, None], rows[None, :] + 1, -1)
+        self.done[:] = rows[None, :] == self.length[:, None] - 1
+        players = np.flatnonzero(self.length)
+        self.reward[players, self.length[players] - 1] = self.payoffs[players]
+
+    def get_transitions(self, player_id):
+        ''' Get the (s, a, r, s', done) transitions of a player, s' of the last one is all zeros
+
+        Args:
+            player_id (int): The id of the player
+
+        Returns:
+            (dict): Arrays with one row per decision: the observation keys (x and z, or obs),
+              legal_mask, action, reward, done, and next_ plus the observation keys and legal_mask
+        '''
+        length = self.length[player_id]
+        keys = ['obs'] if self.pack else ['x', 'z']
+        transitions = {}
+        next_index = self.next_index[player_id, :length]
+        terminal = next_index < 0
+        for key in keys + ['legal_mask']:
+            column = getattr(self, key)[player_id]
+            transitions[key] = column[:length]
+            next_column = column[next_index]
+            next_column[terminal] = 0
+            transitions['next_' + key] = next_column
+        transitions['action'] = self.action[player_id, :length]
+        transitions['reward'] = self.reward[player_id, :length]
+        transitions['done'] = self.done[player_id, :length]
+        return transitions
+
+    def get_targets(self, player_id, discount=1.0):
+        ''' Get the Monte-Carlo returns of the decisions of a player
+
+        Args:
+            player_id (int): The id of the player
+            discount (float): The discount factor
+
+        Returns:
+            (numpy.array): The discounted sum of the rewards from each decision on
+        '''
+        length = self.length[player_id]
+        reward = self.reward[player_id, :length]
+        if discount == 1.0:
+            return np.cumsum(reward[::-1])[::-1].astype(np.float32)
+        # only the last decision has a reward, so G[t] = payoff * discount ** (length - 1 - t),
+        # the powers may underflow to 0 on long games but are never divided by
+        if length == 0:
+            return np.zeros(0, dtype=np.float32)
+        return (reward[-1] * discount ** np.arange(length - 1, -1, -1, dtype=np.float64)).astype(np.float32)
@@ -195,6 +195,55 @@ def remove_illegal(action_probs, legal_actions):
         probs /= sum(probs)
     return probs
 
+def get_packed_size(x_size, z_shape=(4, 126)):
+    ''' Get the number of bytes of a packed observation
+
+    Args:
+        x_size (int): The size of x
+        z_shape (tuple): The shape of z
+
+    Returns:
+        (int): The number of bytes, 101 for the 300 + 504 bits of UNO
+    '''
+    return (x_size + int(np.prod(z_shape)) + 7) // 8
+
+def pack_obs(x, z):
+    ''' Pack 0/1 observations into bits, 8 entries per byte
+
+    Args:
+        x (numpy.array): (..., x_size) the x of one or many states
+        z (numpy.array): (..., 4, 126) the z of the same states
+
+    Returns:
+        (numpy.array): uint8 array of shape (..., packed_size), it can be kept in
+          a replay memory or a shared buffer or saved with np.save
+    '''
+    x = np.asarray(x)
+    z = np.asarray(z)
+    bits = np.concatenate((x, z.reshape(x.shape[:-1] + (-1,))), axis=-1).astype(np.uint8, copy=False)
+    return np.packbits(bits, axis=-1)
+
+def unpack_obs(packed, x_size, z_shape=(4, 126), dtype=int):
+    ''' Unpack observations packed by pack_obs
+
+    Args:
+        packed (numpy.array): (..., packed_size) the packed observations
+        x_size (int): The size of x
+        z_shape (tuple): The shape of z
+        dtype (type): The dtype of x and z
+
+    Returns:
+        (tuple): x of shape (..., x_size) and z of shape (..., *z_shape)
+    '''
+    packed = np.asarray(packed)
+    z_size = int(np.prod(z_shape))
+    bits = np.unpackbits(packed, axis=-1, count=x_size + z_size)
+    if dtype != np.uint8:
+        bits = bits.astype(dtype)
+    x = bits[..., :x_size]
+    z = bits[..., x_size:].reshape(packed.shape[:-1] + tuple(z_shape))
+    return x, z
+
 def tournament(env, num):
     ''' Evaluate he performance of the agents in the environment
 
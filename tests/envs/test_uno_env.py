@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+import rlcard
+from rlcard.envs.uno import encode_batch
+from rlcard.envs.uno_schema import get_schema
+
+
+def random_extracted_states(schema, seed, num_games, obs_dtype=int):
+    ''' Collect the extracted states of seeded random games played through UnoEnv
+    '''
+    np.random.seed(seed)
+    rng = np.random.RandomState(seed)
+    env = rlcard.make('uno', config={'seed': seed, 'obs_schema': schema, 'obs_dtype': obs_dtype})
+    states = []
+    for _ in range(num_games):
+        state, _ = env.reset()
+        while not env.is_over():
+            states.append(state)
+            state, _ = env.step(int(rng.choice(state['legal_ids'])))
+    return states
+
+
+class TestUnoEnvMethods(unittest.TestCase):
+
+    def test_encode_batch(self):
+        for schema in ('300', '430'):
+            for obs_dtype in (int, np.int8):
+                states = random_extracted_states(schema, 0, 5, obs_dtype)
+                x, z, legal_mask = encode_batch([state['raw_obs'] for state in states], obs_dtype, get_schema(schema))
+                self.assertEqual(x.dtype, states[0]['x_batch'].dtype)
+                self.assertTrue(np.array_equal(x, np.stack([state['x_batch'] for state in states])))
+                self.assertTrue(np.array_equal(z, np.stack([state['z_batch'] for state in states])))
+                self.assertTrue(np.array_equal(legal_mask, np.stack([state['legal_mask'] for state in states])))
+
+    def test_num_shuffled_decks(self):
+        env = rlcard.make('uno', config={'seed': 0, 'game_num_shuffled_decks': 4})
+        self.assertEqual(env.game.num_shuffled_decks, 4)
+        for num_left in (3, 2, 1, 0, 3):
+            env.reset()
+            self.assertEqual(len(env.game.shuffled_decks), num_left)
+        self.assertEqual(rlcard.make('uno').game.num_shuffled_decks, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from rlcard.games.uno.batched_game import BatchedUnoGame, NORMAL
+from tests.games.uno_utils import new_game, random_action
+
+
+def mirror(game):
+    ''' Copy the position of a fresh UnoGame into a BatchedUnoGame of one game
+    '''
+    batched = BatchedUnoGame(1, game.get_num_players())
+    batched.init_game()
+    round = game.round
+    deck = game.dealer.get_deck()
+    batched.hand_counts[0] = [player.hand_counts for player in game.players]
+    batched.num_cards[0] = [len(player.hand) for player in game.players]
+    batched.deck[0, :len(deck)] = deck
+    batched.deck_cursor[0] = len(deck)
+    batched.target[0] = round.target
+    batched.last_target[0] = 0 if round.last_target is None else round.last_target
+    batched.direction[0] = round.direction
+    batched.current_player[0] = round.current_player
+    batched.phase[0] = NORMAL
+    batched.is_over[0] = False
+    batched.winner[0] = -1
+    return batched
+
+
+class TestBatchedUnoGameMethods(unittest.TestCase):
+
+    def test_same_as_uno_game(self):
+        rng = np.random.RandomState(0)
+        for seed in range(50):
+            game = new_game(seed)
+            batched = mirror(game)
+            while True:
+                self.assertTrue(np.array_equal(batched.get_legal_mask()[0], game.get_legal_mask()))
+                action = random_action(game, rng)
+                game.step_id(action)
+                current_player, done, payoffs = batched.step(np.array([action]))
+                self.assertEqual(bool(done[0]), game.is_over())
+                if game.is_over():
+                    self.assertEqual(payoffs[0].tolist(), list(game.get_scores()))
+                    break
+                round = game.round
+                self.assertEqual(current_player[0], round.current_player)
+                self.assertEqual(batched.target[0], round.target)
+                self.assertEqual(batched.deck_cursor[0], game.dealer.cursor)
+                self.assertTrue(np.array_equal(batched.hand_counts[0], [player.hand_counts for player in game.players]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from rlcard.games.uno.utils import encode_hand, encode_hand_counts, encode_hand_counts_batch
+from rlcard.games.uno.utils import encode_other_cards, encode_other_cards_counts
+from tests.games.uno_utils import random_states
+
+
+class TestUnoEncoderMethods(unittest.TestCase):
+
+    def test_encode_hand_counts(self):
+        for state in random_states(0, 10):
+            for cards, counts in ((state['hand'], state['hand_counts']), (state['other_cards'], state['unseen_counts'])):
+                expected = encode_hand(cards)
+                encoded = encode_hand_counts(counts)
+                self.assertEqual(encoded.dtype, expected.dtype)
+                self.assertTrue(np.array_equal(encoded, expected))
+                out = np.full(110, 7, dtype=np.int8)
+                self.assertTrue(np.array_equal(encode_hand_counts(counts, out), expected))
+
+    def test_encode_hand_counts_batch(self):
+        states = list(random_states(1, 3))
+        counts = np.stack([state['hand_counts'] for state in states])
+        expected = np.stack([encode_hand(state['hand']) for state in states])
+        self.assertTrue(np.array_equal(encode_hand_counts_batch(counts), expected))
+
+    def test_encode_other_cards_counts(self):
+        for state in random_states(2, 10):
+            expected = encode_other_cards(state['other_cards'])
+            encoded = encode_other_cards_counts(state['unseen_counts'])
+            self.assertEqual(encoded.dtype, expected.dtype)
+            self.assertTrue(np.array_equal(encoded, expected))
+            out = np.full(162, 7, dtype=np.int8)
+            self.assertTrue(np.array_equal(encode_other_cards_counts(state['unseen_counts'], out), expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
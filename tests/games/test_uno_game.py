@@ -0,0 +1,119 @@
+import unittest
+
+import numpy as np
+
+from rlcard.games.uno.game import UnoGame
+from rlcard.games.uno.utils import CARD_TYPE, DRAW_ACTION, faces2list
+from rlcard.games.uno.zobrist import hash_hand, hash_played, hash_deck
+from tests.games.uno_utils import new_game, random_action
+
+
+def get_position(game):
+    ''' Copy everything a step can change
+    '''
+    round = game.round
+    return (game.dealer.get_deck(), [list(player.hand) for player in game.players],
+            [player.hand_counts.tolist() for player in game.players],
+            [player.unseen_counts.tolist() for player in game.players],
+            list(round.played_cards), round.target, round.last_target, round.direction,
+            round.current_player, round.action, round.draw_player, round.draw_card,
+            round.is_over, round.winner, list(round.payoffs), game.get_state_hash())
+
+
+class TestUnoGameMethods(unittest.TestCase):
+
+    def test_step_back(self):
+        rng = np.random.RandomState(0)
+        for seed in range(20):
+            game = new_game(seed, allow_step_back=True)
+            positions = [get_position(game)]
+            while not game.is_over():
+                if len(positions) > 1 and rng.rand() < 0.3:
+                    self.assertTrue(game.step_back())
+                    positions.pop()
+                    self.assertEqual(get_position(game), positions[-1])
+                else:
+                    game.step_id(random_action(game, rng))
+                    positions.append(get_position(game))
+            while len(positions) > 1:
+                self.assertTrue(game.step_back())
+                positions.pop()
+                self.assertEqual(get_position(game), positions[-1])
+            self.assertFalse(game.step_back())
+
+    def test_stored_states_after_step_back(self):
+        rng = np.random.RandomState(1)
+        stored = []
+        for seed in range(20):
+            game = new_game(seed, allow_step_back=True)
+            while not game.is_over():
+                player_id = game.get_player_id()
+                # keep the state unread, its played cards are built when the test reads them
+                stored.append((game.get_state(player_id), faces2list(game.round.played_cards)))
+                if game.round.played_cards and rng.rand() < 0.3:
+                    game.step_back()
+                else:
+                    game.step_id(random_action(game, rng))
+        for state, played_cards in stored:
+            self.assertEqual(state['played_cards'], played_cards)
+
+    def test_bytes_round_trip(self):
+        rng = np.random.RandomState(0)
+        for seed in range(20):
+            game = new_game(seed)
+            for _ in range(rng.randint(0, 40)):
+                if game.is_over():
+                    break
+                game.step_id(random_action(game, rng))
+            data = game.to_bytes(with_rng=True)
+            restored = UnoGame.from_bytes(data)
+            self.assertEqual(restored.to_bytes(with_rng=True), data)
+            self.assertEqual(get_position(restored), get_position(game))
+            # the restored game carries on the same way, reshuffles included
+            while not game.is_over():
+                action = random_action(game, rng)
+                game.step_id(action)
+                restored.step_id(action)
+                self.assertEqual(get_position(restored), get_position(game))
+            self.assertEqual(restored.get_payoffs(), game.get_payoffs())
+
+    def test_incremental_hash(self):
+        rng = np.random.RandomState(0)
+        for seed in range(20):
+            game = new_game(seed)
+            while not game.is_over():
+                self.assertEqual(game.dealer.deck_hash, hash_deck(game.dealer.deck, game.dealer.cursor))
+                for player in game.players:
+                    self.assertEqual(player.hand_hash, hash_hand(player.player_id, player.hand))
+                self.assertEqual(game.round.played_hash, hash_played(game.round.played_cards))
+                # from_bytes hashes the state from scratch
+                restored = UnoGame.from_bytes(game.to_bytes())
+                self.assertEqual(restored.get_state_hash(), game.get_state_hash())
+                for player_id in range(game.get_num_players()):
+                    self.assertEqual(restored.get_info_hash(player_id), game.get_info_hash(player_id))
+                game.step_id(random_action(game, rng))
+
+    def test_drawn_card_hidden_from_opponent(self):
+        rng = np.random.RandomState(0)
+        checked = 0
+        for seed in range(50):
+            game = new_game(seed)
+            while not game.is_over():
+                round = game.round
+                if round.action == DRAW_ACTION and round.draw_player == round.current_player:
+                    drawer = round.current_player
+                    hashes = (game.get_state_hash(), game.get_info_hash(drawer), game.get_info_hash(1 - drawer))
+                    draw_card = round.draw_card
+                    other_card = next(card for card in range(len(CARD_TYPE)) if CARD_TYPE[card] != CARD_TYPE[draw_card])
+                    round.draw_card = other_card
+                    self.assertNotEqual(game.get_state_hash(), hashes[0])
+                    self.assertNotEqual(game.get_info_hash(drawer), hashes[1])
+                    self.assertEqual(game.get_info_hash(1 - drawer), hashes[2])
+                    round.draw_card = draw_card
+                    checked += 1
+                game.step_id(random_action(game, rng))
+        self.assertGreater(checked, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import numpy as np
+
+from rlcard.games.uno.game import UnoGame
+
+
+def new_game(seed, allow_step_back=False):
+    ''' Start a seeded game, the first player is drawn from the global numpy random
+    '''
+    np.random.seed(seed)
+    game = UnoGame(allow_step_back=allow_step_back)
+    game.np_random = np.random.RandomState(seed)
+    game.init_game()
+    return game
+
+def random_action(game, rng):
+    ''' Pick a legal action id of the current player
+    '''
+    return int(rng.choice(np.flatnonzero(game.get_legal_mask())))
+
+def random_states(seed, num_games):
+    ''' Yield the states of both players along seeded random games
+    '''
+    rng = np.random.RandomState(seed)
+    for index in range(num_games):
+        game = new_game(seed + index)
+        while not game.is_over():
+            for player_id in range(game.get_num_players()):
+                yield game.get_state(player_id)
+            game.step_id(random_action(game, rng))